@@ -0,0 +1,161 @@
+"""
+Decode-time comparison of the ingest scripts' old per-city response handling
+(pd.date_range, a groupby/merge on Python dates for humidity, then iterrows
+with a scalar heat index per row) against ingest.decode_response and
+weather_rows, on synthetic responses shaped like openmeteo_sdk's. Also times
+hourly_features, the per-day aggregates of hourly heat index and humidity.
+
+The old path averaged humidity over UTC calendar days, eight hours off the
+Asia/Singapore days the daily values describe; the decoder averages over the
+local day, so Relative Humidity is compared separately from the other columns.
+
+Run from src/scripts:  python -m benchmarks.decoder_benchmark [--cities 22] [--days 730] [--repeats 3]
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from functions.calculate_heat_index import calculate_heat_index
+from ingest import DAILY_VARIABLES, decode_response, weather_rows, hourly_features
+
+DAY = 86400
+HOUR = 3600
+# Midnight in Asia/Singapore as a UTC timestamp, like the API returns for timezone=Asia/Singapore
+LOCAL_MIDNIGHT = int(pd.Timestamp('2024-01-01 16:00', tz='UTC').timestamp())
+
+class SyntheticVariable:
+    def __init__(self, values):
+        self.values = values
+
+    def ValuesAsNumpy(self):
+        return self.values
+
+class SyntheticVariables:
+    """Time/TimeEnd/Interval and Variables(i) of an openmeteo_sdk daily or hourly block"""
+
+    def __init__(self, start, interval, columns):
+        self.start = start
+        self.interval = interval
+        self.columns = columns
+
+    def Time(self):
+        return self.start
+
+    def TimeEnd(self):
+        return self.start + self.interval * len(self.columns[0])
+
+    def Interval(self):
+        return self.interval
+
+    def Variables(self, i):
+        return SyntheticVariable(self.columns[i])
+
+class SyntheticResponse:
+    def __init__(self, days, rng, missing=0.01):
+        daily = [(30 + 3 * rng.randn(days)).astype(np.float32) for _ in DAILY_VARIABLES]
+        for column in daily:
+            column[rng.rand(days) < missing] = np.nan
+        humidity = np.clip(75 + 10 * rng.randn(days * 24), 20, 100).astype(np.float32)
+        hours = np.arange(days * 24)
+        temperature = (28 + 4 * np.sin(2 * np.pi * (hours % 24 - 9) / 24) + rng.randn(days * 24)).astype(np.float32)
+        self.daily = SyntheticVariables(LOCAL_MIDNIGHT, DAY, daily)
+        self.hourly = SyntheticVariables(LOCAL_MIDNIGHT, HOUR, [humidity, temperature])
+
+    def Daily(self):
+        return self.daily
+
+    def Hourly(self):
+        return self.hourly
+
+def legacy_rows(city, response):
+    """The scripts' previous processing of one response, as rows in CSV order"""
+    daily = response.Daily()
+    daily_data = {
+        "date": pd.date_range(
+            start=pd.to_datetime(daily.Time(), unit="s", utc=True),
+            end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
+            freq=pd.Timedelta(seconds=daily.Interval()),
+            inclusive="left"
+        )
+    }
+    daily_data["city"] = city
+    for i, name in enumerate(DAILY_VARIABLES):
+        daily_data[name] = daily.Variables(i).ValuesAsNumpy()
+
+    hourly = response.Hourly()
+    hourly_data = {
+        "date": pd.date_range(
+            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
+            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
+            freq=pd.Timedelta(seconds=hourly.Interval()),
+            inclusive="left"
+        ),
+        "relative_humidity_2m": hourly.Variables(0).ValuesAsNumpy()
+    }
+    hourly_dataframe = pd.DataFrame(data=hourly_data)
+    hourly_dataframe['date'] = hourly_dataframe['date'].dt.date
+    daily_humidity = hourly_dataframe.groupby('date')['relative_humidity_2m'].mean().reset_index()
+    daily_humidity['date'] = pd.to_datetime(daily_humidity['date'])
+
+    daily_dataframe = pd.DataFrame(data=daily_data)
+    daily_dataframe['date_key'] = daily_dataframe['date'].dt.date
+    daily_humidity['date_key'] = daily_humidity['date'].dt.date
+    daily_dataframe = pd.merge(daily_dataframe, daily_humidity[['date_key', 'relative_humidity_2m']],
+                               on='date_key', how='left')
+    daily_dataframe.drop('date_key', axis=1, inplace=True)
+
+    required_fields = ['city', 'date', *DAILY_VARIABLES, 'relative_humidity_2m']
+    rows = []
+    for _, row in daily_dataframe.iterrows():
+        if not any(pd.isna(row[field]) for field in required_fields):
+            heat_index = calculate_heat_index(float(row['temperature_2m_max']), float(row['apparent_temperature_min']))
+            rows.append([row['city'], row['date'], *(row[name] for name in DAILY_VARIABLES),
+                         row['relative_humidity_2m'], heat_index])
+    return rows
+
+def best_of(repeats, run):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = run()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+def main(n_cities=22, days=730, repeats=3, seed=42):
+    rng = np.random.RandomState(seed)
+    responses = [(f'City {i + 1:02d}', SyntheticResponse(days, rng)) for i in range(n_cities)]
+
+    old_time, old_rows = best_of(repeats, lambda: [row for city, response in responses
+                                                   for row in legacy_rows(city, response)])
+    new_time, new_rows = best_of(repeats, lambda: pd.concat(
+        [weather_rows(city, decode_response(response), humidity='apparent_temperature_min')
+         for city, response in responses], ignore_index=True))
+    features_time, features = best_of(repeats, lambda: pd.concat(
+        [hourly_features(city, decode_response(response)) for city, response in responses], ignore_index=True))
+
+    old = pd.DataFrame(old_rows, columns=list(new_rows.columns))
+    shared = [column for column in new_rows.columns[2:] if column != 'Relative Humidity']
+    same_days = len(old) == len(new_rows) and (old['Date'].to_numpy() == new_rows['Date'].to_numpy()).all()
+    max_diff = np.abs(old[shared].to_numpy(dtype=np.float64) - new_rows[shared].to_numpy(dtype=np.float64)).max()
+    humidity_diff = np.abs(old['Relative Humidity'].to_numpy(dtype=np.float64)
+                           - new_rows['Relative Humidity'].to_numpy(dtype=np.float64)).mean()
+
+    print(f"{n_cities} cities x {days} days ({n_cities * days} daily, {n_cities * days * 24} hourly values), "
+          f"best of {repeats}")
+    print(f"{'path':<12}{'seconds':>10}{'rows':>8}{'rows/s':>12}")
+    print(f"{'per-row':<12}{old_time:>10.3f}{len(old):>8}{len(old) / old_time:>12.0f}")
+    print(f"{'decoder':<12}{new_time:>10.3f}{len(new_rows):>8}{len(new_rows) / new_time:>12.0f}")
+    print(f"{'features':<12}{features_time:>10.3f}{len(features):>8}{len(features) / features_time:>12.0f}"
+          f"  (hourly aggregates, decode included)")
+    print(f"speedup {old_time / new_time:.1f}x; same days kept: {same_days}; "
+          f"max |diff| outside humidity: {max_diff:.2e}; mean |diff| in daily humidity (UTC vs local day): "
+          f"{humidity_diff:.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the per-row response handling with the columnar decoder')
+    parser.add_argument('--cities', type=int, default=22, help='Synthetic responses to decode')
+    parser.add_argument('--days', type=int, default=730, help='Days per response')
+    parser.add_argument('--repeats', type=int, default=3, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+    main(args.cities, args.days, args.repeats)
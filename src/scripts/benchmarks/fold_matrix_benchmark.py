@@ -0,0 +1,91 @@
+"""
+Fit-time comparison of the validators' old per-fold pandas path
+(XGBRegressor.fit on X.iloc[idx]) against the shared FoldMatrix, and of
+one outer fold's grid search against the grid engine, which also shares
+one booster between configurations that differ only in n_estimators.
+The FoldMatrix side stops early like the validators do; set
+HEAT_INDEX_EARLY_STOPPING_ROUNDS=0 to compare equal round counts.
+
+Run from src/scripts:  python -m benchmarks.fold_matrix_benchmark [--city Bacoor] [--repeats 3]
+"""
+import os
+import time
+import argparse
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import KFold, TimeSeriesSplit, ParameterGrid
+from sklearn.metrics import mean_squared_error
+
+from predict_heat_index import FEATURES, prepare_data_for_regression
+from storage import WeatherStore
+from training import WeatherDataset
+from validation import DEFAULT_PARAM_GRID, FoldMatrix, get_search_engine
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(script_dir, '..', '..', 'public', 'data', 'historical_weather_data.csv')
+
+def load_dataset(cities=None):
+    """The historical data as the pipeline reads it: synced into the weather store, then a WeatherDataset"""
+    store = WeatherStore()
+    store.sync_from_csv(DATA_PATH)
+    return WeatherDataset.from_store(store, {'City', 'Date'}, cities=cities)
+
+def folds(X):
+    """(name, [(train_idx, test_idx), ...]) for the fold patterns validate_model runs"""
+    k_fold = list(KFold(5, shuffle=True, random_state=42).split(X))
+    time_cv = list(TimeSeriesSplit(5).split(X))
+    # One outer fold's inner grid search: every configuration on the same three inner folds
+    outer_train, _ = next(KFold(5, shuffle=True, random_state=42).split(X))
+    inner = [(outer_train[train], outer_train[test])
+             for train, test in KFold(3, shuffle=True, random_state=42).split(outer_train)]
+    return [('k-fold', [{}], k_fold), ('time-based', [{}], time_cv),
+            ('grid search (1 outer fold)', list(ParameterGrid(DEFAULT_PARAM_GRID)), inner)]
+
+def run_pandas(X, y, configs, fold_list):
+    """Mean MSE per configuration, one XGBRegressor fit per configuration and fold"""
+    scores = []
+    for params in configs:
+        fold_scores = []
+        for train, test in fold_list:
+            model = xgb.XGBRegressor(objective='reg:squarederror', n_jobs=1, verbosity=0, **params)
+            model.fit(X.iloc[train], y.iloc[train])
+            fold_scores.append(mean_squared_error(y.iloc[test], model.predict(X.iloc[test])))
+        scores.append(np.mean(fold_scores))
+    return scores
+
+def run_fold_matrix(X, y, configs, fold_list):
+    """Mean MSE per configuration through the grid engine's shared FoldMatrix evaluation"""
+    engine = get_search_engine('grid')
+    scores = engine._evaluate(configs, FoldMatrix(X, y), fold_list, rung=0, fraction=1.0, study=None)
+    return [-score for score in scores], engine.fits_run
+
+def best_of(repeats, function, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main(city=None, repeats=3):
+    dataset = load_dataset([city] if city else None)
+    city = city or dataset.cities[0]
+    group = prepare_data_for_regression(dataset.city_frame(city).copy())
+    X, y = group[FEATURES], group['Heat Index']
+    print(f"{city}: {len(X)} rows, {len(FEATURES)} features, best of {repeats}")
+    print(f"{'workload':<28}{'fits':>10}{'pandas s':>10}{'FoldMatrix s':>14}{'saved':>8}{'max |dMSE|':>12}")
+    for name, configs, fold_list in folds(X):
+        old_time, old_scores = best_of(repeats, run_pandas, X, y, configs, fold_list)
+        new_time, (new_scores, fits_run) = best_of(repeats, run_fold_matrix, X, y, configs, fold_list)
+        # Scores differ slightly because fold matrices reuse the city-wide histogram cuts
+        drift = float(np.max(np.abs(np.subtract(old_scores, new_scores))))
+        fits = f"{len(configs) * len(fold_list)}->{fits_run}"
+        print(f"{name:<28}{fits:>10}{old_time:>10.2f}{new_time:>14.2f}"
+              f"{1 - new_time / old_time:>8.0%}{drift:>12.2e}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark shared FoldMatrix fits against per-fold pandas fits')
+    parser.add_argument('--city', help='City to benchmark (default: first alphabetically)')
+    parser.add_argument('--repeats', type=int, default=3, help='Timing repeats; the fastest is reported')
+    args = parser.parse_args()
+    main(args.city, args.repeats)
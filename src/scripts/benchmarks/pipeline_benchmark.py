@@ -0,0 +1,178 @@
+"""
+Scaling benchmark of the training and validation pipeline on synthetic cities.
+
+Generates weather rows with the columns of historical_weather_data.csv for a
+chosen number of cities, years of history and feature noise, runs
+process_city_data on each city offline (no cache, models in a temporary
+directory) and writes wall time, XGBoost fits per second, peak RSS and
+validate_model's per-validator seconds to a JSON file.
+
+Run from src/scripts:  python -m benchmarks.pipeline_benchmark [--cities 4] [--years 3] [--noise 0.5]
+                       [--profile quick] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import platform
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import xgboost.sklearn
+
+from functions.calculate_heat_index import calculate_heat_index
+from predict_heat_index import process_city_data
+from training import CPUBudget, TrainingOptions
+from validation import VALIDATION_PROFILES
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(script_dir, 'benchmarks', 'results')
+
+def synthetic_weather_data(n_cities=4, years=3, noise=0.5, seed=42):
+    """
+    Daily rows shaped like historical_weather_data.csv: a seasonal temperature
+    and humidity cycle per city, with Gaussian noise scaled by `noise` on every
+    weather column and Heat Index computed from Temperature Max and Relative Humidity
+    """
+    rng = np.random.RandomState(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=int(365 * years), freq='D')
+    season = np.sin(2 * np.pi * (dates.dayofyear.to_numpy() - 100) / 365.25)
+    frames = []
+    for city in range(n_cities):
+        n = len(dates)
+        offset = rng.uniform(-2, 2)
+        t_max = 31 + offset + 2.5 * season + noise * rng.randn(n)
+        t_min = t_max - 7 + noise * rng.randn(n)
+        humidity = np.clip(78 - 8 * season + 3 * noise * rng.randn(n), 30, 100)
+        frames.append(pd.DataFrame({
+            'City': f'Synthetic City {city + 1:03d}',
+            'Date': dates,
+            'Temperature Max': t_max,
+            'Temperature Min': t_min,
+            'Apparent Temperature Max': t_max + 4 + noise * rng.randn(n),
+            'Apparent Temperature Min': t_min + 3.5 + noise * rng.randn(n),
+            'Wind Speed': np.abs(12 + 4 * noise * rng.randn(n)),
+            'Solar Radiation': np.clip(20 + 4 * season + 3 * noise * rng.randn(n), 0, None),
+            'Relative Humidity': humidity,
+            'Heat Index': [calculate_heat_index(float(t), float(h)) for t, h in zip(t_max.round(2), humidity.round(2))]
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+class FitCounter:
+    """Counts XGBoost training calls, from FoldMatrix (xgb.train) and the sklearn wrapper alike"""
+
+    def __init__(self):
+        self.fits = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def counting(self):
+        originals = (xgb.train, xgboost.sklearn.train)
+
+        def wrap(train):
+            def counted(*args, **kwargs):
+                with self._lock:
+                    self.fits += 1
+                return train(*args, **kwargs)
+            return counted
+
+        xgb.train, xgboost.sklearn.train = wrap(originals[0]), wrap(originals[1])
+        try:
+            yield self
+        finally:
+            xgb.train, xgboost.sklearn.train = originals
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run(n_cities=4, years=3, noise=0.5, profile='quick', seed=42, cpus=None):
+    data = synthetic_weather_data(n_cities, years, noise, seed)
+    cpu_budget = CPUBudget.from_env(total_cores=cpus, city_workers=1).plan(n_cities=1)
+    counter = FitCounter()
+    cities = []
+    with tempfile.TemporaryDirectory() as model_dir, counter.counting():
+        options = TrainingOptions.from_env(use_cache=False, warm_start=False, model_dir=model_dir,
+                                           validation_profile=profile)
+        # Measure every validator in full, whatever deadline the environment sets
+        options.validation_deadline = None
+        started = time.perf_counter()
+        for city, group in data.groupby('City'):
+            fits_before = counter.fits
+            city_started = time.perf_counter()
+            result = process_city_data((city, group.copy()), cpu_budget=cpu_budget, options=options)
+            elapsed = time.perf_counter() - city_started
+            if result is None:
+                raise RuntimeError(f"Pipeline failed for {city}")
+            validation = result.get('validation_results') or {}
+            fits = counter.fits - fits_before
+            cities.append({
+                'city': city,
+                'rows': len(group),
+                'wall_seconds': elapsed,
+                'fits': fits,
+                'fits_per_second': fits / elapsed,
+                'validation_seconds': validation.get('elapsed_seconds'),
+                'validator_seconds': validation.get('validator_seconds'),
+                'holdout_mae': result['metrics']['mean_absolute_error'],
+                'peak_rss_mb': peak_rss_mb()
+            })
+        wall = time.perf_counter() - started
+
+    validators = {}
+    for city in cities:
+        for name, seconds in (city['validator_seconds'] or {}).items():
+            validators[name] = validators.get(name, 0.0) + seconds
+    return {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'parameters': {'cities': n_cities, 'years': years, 'noise': noise, 'profile': profile, 'seed': seed},
+        'environment': {
+            'python': platform.python_version(),
+            'xgboost': xgb.__version__,
+            'machine': platform.machine(),
+            'cpu_budget': cpu_budget.as_dict()
+        },
+        'rows': len(data),
+        'wall_seconds': wall,
+        'fits': counter.fits,
+        'fits_per_second': counter.fits / wall,
+        'peak_rss_mb': peak_rss_mb(),
+        'validator_seconds': validators,
+        'cities': cities
+    }
+
+def main(n_cities=4, years=3, noise=0.5, profile='quick', seed=42, cpus=None, output=None):
+    results = run(n_cities, years, noise, profile, seed, cpus)
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"pipeline_{datetime.now():%Y-%m-%d_%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+    print(f"{n_cities} cities x {years} years ({results['rows']} rows), noise {noise}, {profile} profile")
+    print(f"wall {results['wall_seconds']:.2f}s, {results['fits']} fits ({results['fits_per_second']:.1f}/s), "
+          f"peak RSS {results['peak_rss_mb']:.0f} MB")
+    for name, seconds in results['validator_seconds'].items():
+        print(f"  {name:<20}{seconds:>8.2f}s")
+    print(f"Results written to {output}")
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark process_city_data and validate_model on synthetic cities')
+    parser.add_argument('--cities', type=int, default=4, help='Synthetic cities to generate')
+    parser.add_argument('--years', type=float, default=3, help='Years of daily history per city')
+    parser.add_argument('--noise', type=float, default=0.5, help='Scale of the Gaussian noise on weather features')
+    parser.add_argument('--profile', choices=sorted(VALIDATION_PROFILES), default='quick',
+                        help='Validation profile to run (default: quick)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+    parser.add_argument('--cpus', type=int, help='Cores to budget (default: all available)')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/pipeline_<timestamp>.json)')
+    args = parser.parse_args()
+    main(args.cities, args.years, args.noise, args.profile, args.seed, args.cpus, args.output)
@@ -0,0 +1,69 @@
+"""
+Time-based validation benchmark: the exact path (every split retrained from
+scratch on its expanding window) against warm-started splits, which continue
+the previous split's booster on the rows each split adds, and against the
+rolling-origin window. Reports wall time and how far each fast path's
+metrics move from the exact ones. Warm start estimates the same quantity
+as the exact path, so the run fails (exit status 1) when any city's warm
+start MSE is more than --tolerance from the exact one; the rolling window
+measures a different thing and is only reported.
+
+Run from src/scripts:  python -m benchmarks.time_series_benchmark [--cities Alfonso Bacoor] [--repeats 3] [--tolerance 0.05]
+"""
+import sys
+import time
+import argparse
+import numpy as np
+
+from predict_heat_index import FEATURES, prepare_data_for_regression
+from validation import ValidationSession, perform_time_based_validation
+from .fold_matrix_benchmark import load_dataset
+
+VARIANTS = [('exact', 'expanding', False), ('warm start', 'expanding', True), ('rolling', 'rolling', False)]
+# Variants that must agree with the exact path
+CHECKED = ('warm start',)
+
+def run_variant(group, window, warm_start):
+    # A fresh session per run, so no split is served from another variant's cache
+    session = ValidationSession(group[FEATURES], group['Heat Index'], dates=group['Date'])
+    start = time.perf_counter()
+    results = perform_time_based_validation(group, FEATURES, 'Heat Index', session=session,
+                                            window=window, warm_start=warm_start)
+    return time.perf_counter() - start, results
+
+def main(cities=None, repeats=3, tolerance=0.05):
+    dataset = load_dataset(cities)
+    cities = cities or list(dataset.cities)
+    print(f"{len(cities)} cities, best of {repeats}")
+    print(f"{'variant':<12}{'total s':>10}{'saved':>8}{'mean MAE':>10}{'mean MSE':>10}"
+          f"{'max |dMAE|':>12}{'max |dMSE|':>12}")
+    timings = {name: 0.0 for name, _, _ in VARIANTS}
+    metrics = {name: [] for name, _, _ in VARIANTS}
+    for city in cities:
+        group = prepare_data_for_regression(dataset.city_frame(city).copy())
+        for name, window, warm_start in VARIANTS:
+            runs = [run_variant(group, window, warm_start) for _ in range(repeats)]
+            timings[name] += min(elapsed for elapsed, _ in runs)
+            results = runs[0][1]
+            metrics[name].append((results['mean_mae'], results['mean_mse']))
+    exact = np.array(metrics['exact'])
+    agrees = True
+    for name, _, _ in VARIANTS:
+        scores = np.array(metrics[name])
+        drift = np.max(np.abs(scores - exact), axis=0)
+        check = ''
+        if name in CHECKED:
+            check = 'ok' if drift[1] <= tolerance else f'FAIL (> {tolerance})'
+            agrees = agrees and drift[1] <= tolerance
+        print(f"{name:<12}{timings[name]:>10.2f}{1 - timings[name] / timings['exact']:>8.0%}"
+              f"{scores[:, 0].mean():>10.4f}{scores[:, 1].mean():>10.4f}{drift[0]:>12.4f}{drift[1]:>12.4f}  {check}")
+    return agrees
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark warm-started and rolling time-based validation')
+    parser.add_argument('--cities', nargs='+', help='Cities to benchmark (default: all)')
+    parser.add_argument('--repeats', type=int, default=3, help='Timing repeats; the fastest is reported')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="Largest per-city |MSE| difference from the exact path allowed for warm start")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.cities, args.repeats, args.tolerance) else 1)
@@ -1,14 +1,14 @@
 import os
 import csv
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import requests_cache
-from retry_requests import retry
-import openmeteo_requests
 from loguru import logger
-from functools import lru_cache
 import time
+from storage import WeatherStore, DEFAULT_FEATURES_CSV_PATH
+from ingest import (
+    OpenMeteoFetcher, WeatherSync, DAILY_VARIABLES, HOURLY_VARIABLES, TIMEZONE, decode_response, weather_rows,
+    hourly_features
+)
 
 # Define the root directory and log file path
 root_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,67 +18,10 @@ log_file_path = os.path.join(root_dir, 'logs', 'historical_weather_data.log')
 logger.remove()  # Remove the default logger
 logger.add(log_file_path, rotation="10 MB")  # Add a file handler with rotation
 
-# Function to calculate heat index with LRU cache
-@lru_cache(maxsize=1024)
-def calculate_heat_index(temperature_c, humidity):
-    if pd.isna(temperature_c) or pd.isna(humidity):
-        return None
-    temperature_f = (temperature_c * 9/5) + 32
-    heat_index_f = (-42.379 + 2.04901523 * temperature_f + 10.14333127 * humidity 
-                    - 0.22475541 * temperature_f * humidity - 0.00683783 * temperature_f**2 
-                    - 0.05481717 * humidity**2 + 0.00122874 * temperature_f**2 * humidity 
-                    + 0.00085282 * temperature_f * humidity**2 - 0.00000199 * temperature_f**2 * humidity**2)
-    heat_index_c = (heat_index_f - 32) * 5/9
-    return heat_index_c
-
-# Setup the Open-Meteo API client with cache and retry on error
-cache_session = requests_cache.CachedSession('.cache', expire_after=-1)
-retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-openmeteo = openmeteo_requests.Client(session=retry_session)
-
-# Function to write a single row to the CSV
-def write_row_to_csv(row, csv_writer):
-    csv_writer.writerow(row)
-
-# Function to write data to CSV using ThreadPoolExecutor
-def write_data_to_csv(data, csv_file_path):
-    with open(csv_file_path, mode='w', newline='') as file:
-        csv_writer = csv.writer(file)
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            for row in data:
-                executor.submit(write_row_to_csv, row, csv_writer)
-
 def get_recent_date():
     recent_date = (datetime.today() - timedelta(days=3)).strftime("%Y-%m-%d")
     return recent_date
 
-def append_rows_to_city_end(rows_by_city, row):
-    # row[0] is the city name
-    if row[0] not in rows_by_city:
-        rows_by_city[row[0]] = []
-    rows_by_city[row[0]].append(row)
-
-def read_rows_by_city(csv_file_path):
-    rows_by_city = {}
-    if os.path.exists(csv_file_path):
-        with open(csv_file_path, 'r', newline='') as f:
-            reader = csv.reader(f)
-            header = next(reader, None)
-            for row in reader:
-                city = row[0]
-                if city not in rows_by_city:
-                    rows_by_city[city] = []
-                rows_by_city[city].append(row)
-    return rows_by_city
-
-def write_all_rows(csv_file_path, header, rows_by_city):
-    with open(csv_file_path, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for city in rows_by_city:
-            for row in rows_by_city[city]:
-                writer.writerow(row)
-
 def update_historical_weather_data():
     try:
         start_time = time.time()  # Start the timer
@@ -99,132 +42,66 @@ def update_historical_weather_data():
         output_file = os.path.join(script_dir, '..', '..', 'public', 'data', 'historical_weather_data.csv')
         logger.info(f'Preparing output file at {output_file}')
 
-        # Load existing rows
-        existing_rows_by_city = read_rows_by_city(output_file)
-
-        all_data_to_write = []
+        # Existing rows live in the weather store; pick up the CSV if it changed since the store saw it
+        store = WeatherStore()
+        store.sync_from_csv(output_file)
+        store.sync_from_csv(DEFAULT_FEATURES_CSV_PATH, table='daily_features')
+        frames = []
+        feature_frames = []
 
         # Base URL for the API
         base_url = "https://archive-api.open-meteo.com/v1/archive"
 
-        # Batch processing cities
-        batch_size = 10
-        for i in range(0, len(cities), batch_size):
-            batch_cities = cities[i:i + batch_size]  # Fixed: Use slicing, not indexing
-            logger.info(f'Processing batch: {i // batch_size + 1}')
-
-            for city_data in batch_cities:
-                try:
-                    # Access city data using dictionary keys from the CSV
-                    # The keys should match the header in city_coords.csv
-                    city_name = city_data.get('City')
-                    latitude = city_data.get('Latitude')
-                    longitude = city_data.get('Longitude')
-                    
-                    # Check if we have valid data
-                    if not all([city_name, latitude, longitude]):
-                        logger.warning(f'Missing data in city record: {city_data}')
-                        continue
-                        
-                    logger.info(f'Processing city: {city_name}')
-
-                    # Define the date range for the past two years
-                    end_date = get_recent_date()
-                    start_date = get_recent_date()
-                    logger.info('Date range set')
-
-                    # Fetch weather data with updated parameters to match new API URL structure
-                    params = {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "start_date": start_date,
-                        "end_date": end_date,
-                        "daily": ["temperature_2m_max", "temperature_2m_min", "apparent_temperature_max", "apparent_temperature_min", "wind_speed_10m_max", "shortwave_radiation_sum"],
-                        "hourly": ["relative_humidity_2m"],
-                        "temperature_unit": "fahrenheit",
-                        "timezone": "Asia/Singapore"
-                    }
-
-                    # Fetch weather data using the new base URL
-                    responses = openmeteo.weather_api(base_url, params=params)
-
-                    # Process the response
-                    if responses:
-                        response = responses[0]
-                        daily = response.Daily()
-                        daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
-                        daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
-                        daily_apparent_temperature_max = daily.Variables(2).ValuesAsNumpy()
-                        daily_apparent_temperature_min = daily.Variables(3).ValuesAsNumpy()  
-                        daily_wind_speed_10m_max = daily.Variables(4).ValuesAsNumpy() 
-                        daily_shortwave_radiation_sum = daily.Variables(5).ValuesAsNumpy() 
-
-                        # Process hourly data
-                        hourly = response.Hourly()
-                        hourly_relative_humidity_2m = hourly.Variables(0).ValuesAsNumpy()
-
-                        daily_data = {
-                            "date": pd.date_range(
-                                start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-                                end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-                                freq=pd.Timedelta(seconds=daily.Interval()),
-                                inclusive="left"
-                            )
-                        }
-                        daily_data["city"] = city_name  # Use city_name instead of city
-                        daily_data["temperature_2m_max"] = daily_temperature_2m_max
-                        daily_data["temperature_2m_min"] = daily_temperature_2m_min
-                        daily_data["apparent_temperature_max"] = daily_apparent_temperature_max
-                        daily_data["apparent_temperature_min"] = daily_apparent_temperature_min  
-                        daily_data["wind_speed_10m_max"] = daily_wind_speed_10m_max 
-                        daily_data["shortwave_radiation_sum"] = daily_shortwave_radiation_sum
-
-                        # Process hourly data into daily averages
-                        hourly_data = {
-                            "date": pd.date_range(
-                                start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                                end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                                freq=pd.Timedelta(seconds=hourly.Interval()),
-                                inclusive="left"
-                            ),
-                            "relative_humidity_2m": hourly_relative_humidity_2m
-                        }
-                        hourly_dataframe = pd.DataFrame(data=hourly_data)
-                        hourly_dataframe['date'] = hourly_dataframe['date'].dt.date
-                        daily_humidity = hourly_dataframe.groupby('date')['relative_humidity_2m'].mean().reset_index()
-                        daily_humidity['date'] = pd.to_datetime(daily_humidity['date'])
-
-                        daily_dataframe = pd.DataFrame(data=daily_data)
-                        # Calculate daily average relative humidity
-                        avg_humidity = hourly_relative_humidity_2m.mean() if len(hourly_relative_humidity_2m) > 0 else None
-                        daily_dataframe['relative_humidity_2m'] = avg_humidity
-
-                        def validate_row(row):
-                            # Ensure all required fields are present and not None
-                            required_fields = ['city', 'date', 'temperature_2m_max', 'temperature_2m_min', 'apparent_temperature_max', 'apparent_temperature_min', 'wind_speed_10m_max', 'shortwave_radiation_sum', 'relative_humidity_2m']
-                            for field in required_fields:
-                                if pd.isna(row[field]):
-                                    return False
-                            return True
-
-                        for index, row in daily_dataframe.iterrows():
-                            if validate_row(row):
-                                row['date'] = get_recent_date()
-                                heat_index = calculate_heat_index(row['temperature_2m_max'], row['relative_humidity_2m'])
-                                new_row = [row['city'], row['date'], row['temperature_2m_max'], row['temperature_2m_min'], row['apparent_temperature_max'], row['apparent_temperature_min'], row['wind_speed_10m_max'], row['shortwave_radiation_sum'], row['relative_humidity_2m'], heat_index]
-                                city_name = new_row[0]
-                                if city_name not in existing_rows_by_city:
-                                    existing_rows_by_city[city_name] = []
-                                existing_rows_by_city[city_name].append(new_row)
-                            else:
-                                logger.warning(f'Invalid data found in row {index}')
-                except Exception as e:
-                    logger.error(f'Error processing city data: {city_data}: {e}')
-
-        header = ['City', 'Date', 'Temperature Max', 'Temperature Min', 'Apparent Temperature Max',
-                  'Apparent Temperature Min', 'Wind Speed', 'Solar Radiation', 'Relative Humidity',
-                  'Heat Index']
-        write_all_rows(output_file, header, existing_rows_by_city)
+        # Each city is synced from the day after its latest stored day up to the most recent archived day
+        end_date = get_recent_date()
+        logger.info('Date range set')
+        locations = []
+        for city_data in cities:
+            # Access city data using dictionary keys from the CSV
+            # The keys should match the header in city_coords.csv
+            city_name = city_data.get('City')
+            latitude = city_data.get('Latitude')
+            longitude = city_data.get('Longitude')
+
+            # Check if we have valid data
+            if not all([city_name, latitude, longitude]):
+                logger.warning(f'Missing data in city record: {city_data}')
+                continue
+
+            locations.append((city_name, latitude, longitude))
+
+        # Fetch weather data with updated parameters to match new API URL structure
+        params = {
+            "daily": list(DAILY_VARIABLES),
+            "hourly": list(HOURLY_VARIABLES),
+            "timezone": TIMEZONE
+        }
+
+        sync = WeatherSync(store, OpenMeteoFetcher(base_url))
+        for city_name, response in sync.fetch(locations, params, end_date):
+            try:
+                logger.info(f'Processing city: {city_name}')
+                # Process the response
+                if response is not None:
+                    # Rows are built exactly as historical_weather_data.py builds them (Celsius, UTC
+                    # timestamp dates, the same Heat Index inputs) since training reads both alike
+                    columns = decode_response(response)
+                    rows = weather_rows(city_name, columns, humidity='apparent_temperature_min')
+                    frames.append(sync.check_rows(city_name, rows))
+                    feature_frames.append(sync.check_rows(city_name, hourly_features(city_name, columns)))
+            except Exception as e:
+                logger.error(f'Error processing city data: {city_name}: {e}')
+
+        # Upsert the missing days and append them to the CSV; a rerun writes nothing
+        if frames:
+            # Timestamp rows replace the bare-date rows older daily runs wrote for the same local days
+            rows = pd.concat(frames, ignore_index=True)
+            store.append(rows, output_file, replaces=sync.replaced_days(rows))
+            features = pd.concat(feature_frames, ignore_index=True)
+            store.append(features, DEFAULT_FEATURES_CSV_PATH, table='daily_features',
+                         replaces=sync.replaced_days(features))
+        else:
+            logger.info('No new data to write')
 
         elapsed_time = time.time() - start_time  # Calculate elapsed time
         logger.info(f'Total time taken for the process to complete: {elapsed_time:.2f} seconds')
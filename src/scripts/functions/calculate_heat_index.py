@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from functools import lru_cache
 
@@ -12,3 +13,16 @@ def calculate_heat_index(temperature_c, humidity):
                     + 0.00085282 * temperature_f * humidity**2 - 0.00000199 * temperature_f**2 * humidity**2)
     heat_index_c = (heat_index_f - 32) * 5/9
     return heat_index_c
+
+def calculate_heat_index_array(temperature_c, humidity):
+    """calculate_heat_index over whole arrays in float64; NaN where either input is NaN"""
+    temperature_f = np.asarray(temperature_c, dtype=np.float64) * 9/5 + 32
+    humidity = np.asarray(humidity, dtype=np.float64)
+    heat_index_f = (-42.379 + 2.04901523 * temperature_f + 10.14333127 * humidity
+                    - 0.22475541 * temperature_f * humidity - 0.00683783 * temperature_f**2
+                    - 0.05481717 * humidity**2 + 0.00122874 * temperature_f**2 * humidity
+                    + 0.00085282 * temperature_f * humidity**2 - 0.00000199 * temperature_f**2 * humidity**2)
+    return (heat_index_f - 32) * 5/9
+
+# Lower bounds (°C) of INET's caution, warning, danger and extreme heat index levels
+HEAT_INDEX_THRESHOLDS = (27, 33, 42, 52)
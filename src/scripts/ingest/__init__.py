@@ -0,0 +1,29 @@
+# This file marks the ingest directory as a Python package
+from .open_meteo_fetcher import (
+    OpenMeteoFetcher, RateLimiter, FETCH_WORKERS, FETCH_RATE, FETCH_BATCH_SIZE, FETCH_MAX_URL_LENGTH
+)
+from .open_meteo_decoder import (
+    DAILY_VARIABLES, HOURLY_VARIABLES, CSV_COLUMNS, daily_grid, daily_mean, decode_response, weather_rows,
+    hourly_features
+)
+from .weather_sync import WeatherSync, SYNC_HISTORY_DAYS, TIMEZONE
+
+__all__ = [
+    'OpenMeteoFetcher',
+    'RateLimiter',
+    'FETCH_WORKERS',
+    'FETCH_RATE',
+    'FETCH_BATCH_SIZE',
+    'FETCH_MAX_URL_LENGTH',
+    'DAILY_VARIABLES',
+    'HOURLY_VARIABLES',
+    'CSV_COLUMNS',
+    'daily_grid',
+    'daily_mean',
+    'decode_response',
+    'weather_rows',
+    'hourly_features',
+    'WeatherSync',
+    'SYNC_HISTORY_DAYS',
+    'TIMEZONE'
+]
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from loguru import logger
+from functions.calculate_heat_index import calculate_heat_index_array, HEAT_INDEX_THRESHOLDS
+from storage import FEATURE_COLUMNS
+
+# Variables both ingest scripts request, in request order (Variables(i) follows it)
+DAILY_VARIABLES = ("temperature_2m_max", "temperature_2m_min", "apparent_temperature_max", "apparent_temperature_min",
+                   "wind_speed_10m_max", "shortwave_radiation_sum")
+HOURLY_VARIABLES = ("relative_humidity_2m", "temperature_2m")
+
+# historical_weather_data.csv column for each decoded variable
+CSV_COLUMNS = {
+    'temperature_2m_max': 'Temperature Max',
+    'temperature_2m_min': 'Temperature Min',
+    'apparent_temperature_max': 'Apparent Temperature Max',
+    'apparent_temperature_min': 'Apparent Temperature Min',
+    'wind_speed_10m_max': 'Wind Speed',
+    'shortwave_radiation_sum': 'Solar Radiation',
+    'relative_humidity_2m': 'Relative Humidity'
+}
+
+def _times(variables):
+    return np.arange(variables.Time(), variables.TimeEnd(), variables.Interval(), dtype=np.int64)
+
+def daily_grid(hourly_values, hourly_start, hourly_interval, day_start, day_interval, n_days):
+    """
+    An hourly series laid out as (n_days, hours per day) in float64, days
+    starting at day_start; hours the series does not cover are NaN
+    """
+    per_day = day_interval // hourly_interval
+    lead = (hourly_start - day_start) // hourly_interval
+    grid = np.full(n_days * per_day, np.nan, dtype=np.float64)
+    src_start = max(0, -lead)
+    dst_start = max(0, lead)
+    count = max(0, min(len(hourly_values) - src_start, len(grid) - dst_start))
+    grid[dst_start:dst_start + count] = hourly_values[src_start:src_start + count]
+    return grid.reshape(n_days, per_day)
+
+def _row_max(grid):
+    # NaN for rows without any value, without nanmax's all-NaN warning
+    valid = ~np.isnan(grid)
+    return np.where(valid.any(axis=1), np.where(valid, grid, -np.inf).max(axis=1), np.nan)
+
+def _row_mean(grid):
+    valid = ~np.isnan(grid)
+    counts = valid.sum(axis=1)
+    sums = np.where(valid, grid, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def daily_mean(hourly_values, hourly_start, hourly_interval, day_start, day_interval, n_days):
+    """Mean of an hourly series over each of n_days days starting at day_start; days with no values are NaN"""
+    grid = daily_grid(hourly_values, hourly_start, hourly_interval, day_start, day_interval, n_days)
+    return _row_mean(grid).astype(np.float32)
+
+def decode_response(response, daily_variables=DAILY_VARIABLES, hourly_variables=HOURLY_VARIABLES):
+    """
+    Columns of one location's response: 'date' (UTC datetime64 start of each
+    local day), every daily variable as the float32 array the response holds,
+    and every hourly variable reduced to its mean over the same local days.
+    'hourly' holds the hourly variables themselves as (days, hours) grids.
+    """
+    daily = response.Daily()
+    times = _times(daily)
+    columns = {'date': pd.to_datetime(times, unit='s', utc=True)}
+    for i, name in enumerate(daily_variables):
+        columns[name] = daily.Variables(i).ValuesAsNumpy()
+    columns['hourly'] = {}
+    if hourly_variables:
+        hourly = response.Hourly()
+        for i, name in enumerate(hourly_variables):
+            grid = daily_grid(hourly.Variables(i).ValuesAsNumpy(), hourly.Time(), hourly.Interval(),
+                              daily.Time(), daily.Interval(), len(times))
+            columns['hourly'][name] = grid
+            columns[name] = _row_mean(grid).astype(np.float32)
+    return columns
+
+def _valid_days(columns):
+    return np.logical_and.reduce([~np.isnan(columns[name]) for name in CSV_COLUMNS])
+
+def weather_rows(city, columns, humidity='relative_humidity_2m'):
+    """
+    DataFrame with the historical_weather_data.csv columns for the days whose
+    decoded values are all present, Heat Index computed from Temperature Max
+    and the `humidity` column
+    """
+    names = list(CSV_COLUMNS)
+    valid = _valid_days(columns)
+    if not valid.all():
+        logger.warning(f'Invalid data found in {int((~valid).sum())} of {len(valid)} rows for {city}')
+    rows = pd.DataFrame({'City': city, 'Date': columns['date'][valid]})
+    for name in names:
+        rows[CSV_COLUMNS[name]] = columns[name][valid]
+    rows['Heat Index'] = calculate_heat_index_array(columns['temperature_2m_max'][valid], columns[humidity][valid])
+    return rows
+
+def hourly_features(city, columns, temperature_unit='celsius'):
+    """
+    DataFrame with the storage.FEATURE_COLUMNS aggregates of each local day's
+    hourly temperature and humidity, for the same days weather_rows keeps:
+    the hourly heat index's max and mean, the hours it reaches each INET
+    threshold, and the day's max temperature with the humidity at that hour.
+    Temperatures are in Celsius whatever unit was requested.
+    """
+    valid = _valid_days(columns)
+    temperature = columns['hourly']['temperature_2m'][valid]
+    humidity = columns['hourly']['relative_humidity_2m'][valid]
+    if temperature_unit == 'fahrenheit':
+        temperature = (temperature - 32) * 5/9
+    heat_index = calculate_heat_index_array(temperature, humidity)
+    has_hours = ~np.isnan(heat_index).all(axis=1)
+
+    # The hour of each day's max temperature; days without temperatures get NaN below
+    hottest = np.where(np.isnan(temperature), -np.inf, temperature).argmax(axis=1)
+    has_temperature = ~np.isnan(temperature).all(axis=1)
+
+    features = {
+        'City': city,
+        'Date': columns['date'][valid],
+        'Max Hourly Heat Index': _row_max(heat_index),
+        'Mean Hourly Heat Index': _row_mean(heat_index)
+    }
+    for threshold in HEAT_INDEX_THRESHOLDS:
+        features[f'Hours Heat Index {threshold}+'] = np.where(has_hours, (heat_index >= threshold).sum(axis=1), np.nan)
+    features['Max Hourly Temperature'] = _row_max(temperature)
+    features['Humidity At Max Temperature'] = np.where(
+        has_temperature, humidity[np.arange(len(humidity)), hottest], np.nan)
+    return pd.DataFrame(features, columns=list(FEATURE_COLUMNS))
@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+import requests_cache
+from requests.adapters import HTTPAdapter
+from retry_requests import retry
+import openmeteo_requests
+from loguru import logger
+
+# Requests in flight at once, and the most requests per second sent to the API
+FETCH_WORKERS = int(os.environ.get('HEAT_INDEX_FETCH_WORKERS', 8))
+FETCH_RATE = float(os.environ.get('HEAT_INDEX_FETCH_RATE', 5))
+# Locations sent in one multi-location request, and the longest request URL allowed
+FETCH_BATCH_SIZE = int(os.environ.get('HEAT_INDEX_FETCH_BATCH_SIZE', 50))
+FETCH_MAX_URL_LENGTH = int(os.environ.get('HEAT_INDEX_FETCH_MAX_URL_LENGTH', 2000))
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads; rate=None never waits"""
+
+    def __init__(self, rate=FETCH_RATE):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a RateLimiter slot before each request reaches the network"""
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.wait()
+        return super().send(request, **kwargs)
+
+class OpenMeteoFetcher:
+    """
+    Fetches one Open-Meteo request per location on a bounded thread pool.
+
+    Each worker thread has its own client over the shared requests_cache file
+    and the same retry settings the scripts used before, so a failed request
+    is retried on its own. Cache hits return without touching the rate
+    limiter; only requests that go out to the API wait for a slot.
+    """
+
+    def __init__(self, url, max_workers=FETCH_WORKERS, rate=FETCH_RATE, cache_name='.cache',
+                 retries=5, backoff_factor=0.2, batch_size=FETCH_BATCH_SIZE, max_url_length=FETCH_MAX_URL_LENGTH):
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.max_url_length = max_url_length
+        self.max_workers = max(1, max_workers)
+        self.limiter = RateLimiter(rate)
+        self.cache_name = cache_name
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            cache_session = requests_cache.CachedSession(self.cache_name, expire_after=-1)
+            retry_session = retry(cache_session, retries=self.retries, backoff_factor=self.backoff_factor)
+            for prefix in ('http://', 'https://'):
+                max_retries = retry_session.get_adapter(prefix).max_retries
+                retry_session.mount(prefix, RateLimitedAdapter(self.limiter, max_retries=max_retries))
+            client = self._local.client = openmeteo_requests.Client(session=retry_session)
+        return client
+
+    def _fetch_one(self, key, params):
+        try:
+            return self._client().weather_api(self.url, params=params)
+        except Exception as e:
+            logger.error(f"Error fetching weather data for {key}: {e}")
+            return None
+
+    def fetch(self, requests):
+        """
+        Run (key, params) requests concurrently and return (key, responses) in
+        the order given; responses is None when the request failed after retries
+        """
+        requests = list(requests)
+        if not requests:
+            return []
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(requests))) as executor:
+            futures = [executor.submit(self._fetch_one, key, params) for key, params in requests]
+            results = [(key, future.result()) for (key, _), future in zip(requests, futures)]
+        failed = sum(1 for _, responses in results if responses is None)
+        logger.info(f"Fetched {len(results) - failed}/{len(results)} requests in {time.time() - started:.2f} seconds "
+                    f"({self.max_workers} workers)")
+        return results
+
+    @staticmethod
+    def _location_params(params, batch):
+        # The API takes comma-separated coordinate lists and answers in the same order
+        return {
+            **params,
+            'latitude': ','.join(str(latitude) for _, latitude, _ in batch),
+            'longitude': ','.join(str(longitude) for _, _, longitude in batch)
+        }
+
+    def url_length(self, params):
+        """Length of the request URL openmeteo_requests sends for these params"""
+        return len(self.url) + 1 + len(urlencode({**params, 'format': 'flatbuffers'}, doseq=True))
+
+    def batch_locations(self, locations, params):
+        """
+        Split (key, latitude, longitude) locations, in order, into batches of at
+        most batch_size whose request URL stays within max_url_length; a
+        location too long on its own still gets a batch of one
+        """
+        batches = []
+        batch = []
+        for location in locations:
+            if batch and (len(batch) >= self.batch_size
+                          or self.url_length(self._location_params(params, batch + [location])) > self.max_url_length):
+                batches.append(batch)
+                batch = []
+            batch.append(location)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def fetch_locations(self, locations, params):
+        """
+        Fetch the same params for many (key, latitude, longitude) locations with
+        multi-location requests and return (key, response) in the order given.
+
+        A batch that fails, or answers with the wrong number of responses, is
+        fetched again one location at a time; response is None for a location
+        that still fails.
+        """
+        locations = list(locations)
+        batches = self.batch_locations(locations, params)
+        logger.info(f"Fetching {len(locations)} locations in {len(batches)} requests")
+        batch_requests = [(f"{batch[0][0]}..{batch[-1][0]} ({len(batch)} locations)" if len(batch) > 1 else batch[0][0],
+                           self._location_params(params, batch))
+                          for batch in batches]
+
+        responses_by_position = {}
+        retry_singly = []
+        position = 0
+        for batch, (label, responses) in zip(batches, self.fetch(batch_requests)):
+            positions = range(position, position + len(batch))
+            position += len(batch)
+            if responses is not None and len(responses) != len(batch):
+                logger.warning(f"Expected {len(batch)} responses for {label}, got {len(responses)}")
+                responses = None
+            if responses is None and len(batch) > 1:
+                retry_singly.extend(zip(positions, batch))
+                continue
+            for i, response in zip(positions, responses or [None] * len(batch)):
+                responses_by_position[i] = response
+
+        if retry_singly:
+            logger.warning(f"Fetching {len(retry_singly)} locations from failed batches one at a time")
+            single_requests = [(location[0], self._location_params(params, [location])) for _, location in retry_singly]
+            for (i, _), (_, responses) in zip(retry_singly, self.fetch(single_requests)):
+                responses_by_position[i] = responses[0] if responses else None
+
+        return [(location[0], responses_by_position[i]) for i, location in enumerate(locations)]
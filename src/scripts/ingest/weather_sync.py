@@ -0,0 +1,89 @@
+import os
+from datetime import date, timedelta
+import pandas as pd
+from loguru import logger
+from storage import parse_dates
+
+# Days of history a city without stored rows is backfilled with
+SYNC_HISTORY_DAYS = int(os.environ.get('HEAT_INDEX_SYNC_HISTORY_DAYS', 2 * 365))
+
+# Timezone the ingest scripts request; stored timestamps are UTC starts of its days
+TIMEZONE = "Asia/Singapore"
+
+class WeatherSync:
+    """
+    Incremental sync of the store against the archive API driven by per-city
+    high-water marks: the latest local day each city has in the store, among
+    the timestamped rows training can load. Each
+    city is requested only from the day after its mark up to end_date, cities
+    without rows get history_days of backfill, and cities with the same
+    missing range share multi-location requests. Writing the results with
+    WeatherStore.append keeps reruns idempotent.
+    """
+
+    def __init__(self, store, fetcher, history_days=SYNC_HISTORY_DAYS, timezone=TIMEZONE, table='daily_weather'):
+        self.store = store
+        self.fetcher = fetcher
+        self.history_days = history_days
+        self.timezone = timezone
+        self.table = table
+
+    def watermarks(self):
+        """
+        {city: latest stored local date}; bare 'YYYY-MM-DD' rows (older daily
+        runs, in Fahrenheit) are left out, so their days are fetched again as
+        timestamps, which replace them through replaced_days
+        """
+        return {city: pd.Timestamp(timestamp).tz_convert(self.timezone).date()
+                for city, (timestamp, _) in self.store.latest_dates(self.table).items() if timestamp}
+
+    def replaced_days(self, rows):
+        """(City, 'YYYY-MM-DD') keys of the bare-date rows that rows supersede: each timestamp's local day"""
+        days = pd.DatetimeIndex(pd.to_datetime(rows['Date'], utc=True)).tz_convert(self.timezone).strftime('%Y-%m-%d')
+        return list(zip(rows['City'].astype(str), days))
+
+    @staticmethod
+    def check_rows(city, rows):
+        """Rows whose Date text parses the way training loads it; raises ValueError otherwise"""
+        unparsed = parse_dates(rows['Date'].astype(str)).isna().to_numpy()
+        if unparsed.any():
+            message = (f"{int(unparsed.sum())} of {len(rows)} rows for {city} have dates training cannot load, "
+                       f"e.g. {rows['Date'].astype(str).to_numpy()[unparsed][0]!r}")
+            logger.error(message)
+            raise ValueError(message)
+        return rows
+
+    def plan(self, locations, end_date):
+        """
+        {(start_date, end_date): [(city, latitude, longitude), ...]} of the
+        missing ranges, in the order the locations were given; cities already
+        synced up to end_date are left out
+        """
+        end = date.fromisoformat(str(end_date))
+        marks = self.watermarks()
+        ranges = {}
+        for location in locations:
+            mark = marks.get(location[0])
+            start = mark + timedelta(days=1) if mark else end - timedelta(days=self.history_days - 1)
+            if start > end:
+                continue
+            ranges.setdefault((start.isoformat(), end.isoformat()), []).append(location)
+        return ranges
+
+    def fetch(self, locations, params, end_date):
+        """
+        (city, response) for every city with missing days, in the order the
+        locations were given; response is None for a city whose request failed
+        """
+        locations = list(locations)
+        ranges = self.plan(locations, end_date)
+        if not ranges:
+            logger.info(f"All {len(locations)} cities are synced up to {end_date}")
+            return []
+        for (start, end), batch in ranges.items():
+            logger.info(f"{len(batch)} cities missing {start} to {end}")
+
+        responses = {}
+        for (start, end), batch in ranges.items():
+            responses.update(self.fetcher.fetch_locations(batch, {**params, 'start_date': start, 'end_date': end}))
+        return [(location[0], responses[location[0]]) for location in locations if location[0] in responses]
@@ -7,20 +7,36 @@ from datetime import timedelta, datetime
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from loguru import logger
-from functools import lru_cache
-import multiprocessing
 import concurrent.futures
+import argparse
 import sys
 from tqdm import tqdm, trange  # For progress bars
 
 # Import validation functions from new modules
 from validation import (
-    perform_k_fold_cross_validation,
-    perform_nested_cv_with_param_tuning,
-    bootstrap_evaluation,
-    perform_permutation_test,
-    perform_time_based_validation,
-    validate_model
+    validate_model,
+    VALIDATION_PROFILES,
+    get_validation_profile,
+    SEARCH_ENGINES,
+    BOOTSTRAP_MODES,
+    IMPORTANCE_METHODS,
+    TIME_SERIES_WINDOWS,
+    EARLY_STOPPING_ROUNDS,
+    fit_early_stopped,
+    load_previous_tuning
+)
+from storage import WeatherStore
+from training import (
+    CPUBudget,
+    ModelCache,
+    STAGES,
+    TRAINING_MODES,
+    ModelStore,
+    SharedCityDataset,
+    TrainingOptions,
+    WeatherDataset,
+    attach_worker_dataset,
+    get_worker_dataset
 )
 
 # Get script directory for relative paths
@@ -38,8 +54,13 @@ logger.add(log_file_path, rotation="10 MB", format="{time} | {level} | {message}
 # Keep technical logs only in the file, not in the console
 logger.add(sys.stderr, format="<dim>{time:HH:mm:ss}</dim> | <level>{message}</level>", level="INFO", filter=lambda record: record.get("user_friendly", False))
 
-# Set maximum number of threads for parallel processing
-MAX_THREADS = max(4, multiprocessing.cpu_count() - 1)
+# City workers run as threads by default; 'process' sidesteps the GIL for the per-city work
+EXECUTION_MODES = ('thread', 'process')
+EXECUTION_MODE = os.environ.get('HEAT_INDEX_EXECUTION_MODE', 'thread')
+
+# Use the features available in the CSV
+FEATURES = ['day', 'Temperature Max', 'Temperature Min', 'Apparent Temperature Max',
+            'Apparent Temperature Min', 'Wind Speed', 'Solar Radiation', 'Relative Humidity']
 
 def console_log(message, is_important=False, emoji=None):
     """Log user-friendly messages to console with formatting"""
@@ -51,34 +72,6 @@ def console_log(message, is_important=False, emoji=None):
     else:
         tqdm.write(f"{emoji} {message}")
 
-@lru_cache(maxsize=32)
-def load_data(file_path):
-    try:
-        logger.info(f"Loading data from {file_path}")
-        data = pd.read_csv(file_path)
-        logger.info(f"Data loaded successfully with {len(data)} rows")
-        return data
-    except Exception as e:
-        logger.error(f"Error loading data: {e}")
-        raise
-
-def check_required_columns(data, required_columns):
-    try:
-        if required_columns.issubset(data.columns):
-            logger.info("CSV has all the required columns")
-            data['Date'] = pd.to_datetime(data['Date'], errors='coerce')
-            # Make all dates timezone-naive
-            data['Date'] = data['Date'].dt.tz_localize(None)
-            data.sort_values(by=['City', 'Date'], inplace=True)
-        else:
-            missing_cols = required_columns - set(data.columns)
-            logger.error(f"The CSV file must contain the following columns: {', '.join(missing_cols)}")
-            raise KeyError(f"The CSV file must contain the following columns: {', '.join(missing_cols)}")
-        return data
-    except Exception as e:
-        logger.error(f"Error checking required columns: {e}")
-        raise
-
 def prepare_data_for_regression(group):
     try:
         # Vectorized operation for better performance
@@ -104,40 +97,72 @@ def create_holdout_validation_set(data, test_size=0.1, random_state=42):
         logger.error(f"Error creating holdout validation set: {e}")
         raise
 
-def train_model(X_train, y_train, params=None):
+def train_model(X_train, y_train, params=None, n_jobs=1, enable_categorical=False):
     try:
         logger.info("Training the model")
+        if enable_categorical:
+            # Native categorical splits (the pooled model's City column) need the hist tree method
+            params = dict(params or {}, enable_categorical=True)
         if params is None:
-            # Add early stopping to prevent overfitting and improve speed
             model = xgb.XGBRegressor(
                 objective='reg:squarederror',
-                n_jobs=1,  # Single thread here as we'll parallelize at a higher level
+                tree_method='hist',
+                n_jobs=n_jobs,  # Threads allotted by the CPU budget; cities parallelize at a higher level
                 verbosity=0  # Reduce verbosity for speed
             )
         else:
             model = xgb.XGBRegressor(
                 objective='reg:squarederror',
-                n_jobs=1,
+                tree_method='hist',
+                n_jobs=n_jobs,
                 verbosity=0,
                 **params
             )
         
-        # Use early stopping if validation data is provided
-        model.fit(X_train, y_train)
-        return model
+        # Early stopping on the last rows to prevent overfitting and improve speed
+        return fit_early_stopped(model, X_train, y_train)
     except Exception as e:
         logger.error(f"Error training model: {e}")
         raise
 
+def continue_training(model, X_new, y_new, params, rounds, n_jobs=1):
+    """Add boosting rounds to a stored model using only rows it has not been trained on"""
+    try:
+        logger.info(f"Continuing training with {rounds} rounds on {len(X_new)} new rows")
+        params = {key: value for key, value in (params or {}).items() if key != 'n_estimators'}
+        booster = model.get_booster()
+        best_iteration = booster.attr('best_iteration')
+        if best_iteration is not None:
+            # Continue from the early-stopped model's best trees, not the rounds boosted past them
+            booster = booster[:int(best_iteration) + 1]
+            booster.set_attr(best_iteration=None, best_score=None)
+        continued = xgb.XGBRegressor(
+            objective='reg:squarederror',
+            tree_method='hist',
+            n_jobs=n_jobs,
+            verbosity=0,
+            **params,
+            n_estimators=rounds
+        )
+        continued.fit(X_new, y_new, xgb_model=booster)
+        return continued
+    except Exception as e:
+        logger.error(f"Error continuing model training: {e}")
+        raise
+
 def make_predictions(model, group, date_range, features):
     try:
         future_days = np.array([(date - group['Date'].min()).days for date in date_range])
         future_X = pd.DataFrame(future_days, columns=['day'])
         
         # More efficient feature construction
-        feature_means = {col: group[col].mean() for col in features[1:]}
+        feature_means = {col: group[col].mean() for col in features[1:] if col != 'City'}
         for col, val in feature_means.items():
             future_X[col] = val
+        if 'City' in features:
+            # Pooled model: every future row belongs to this group's city
+            future_X['City'] = pd.Categorical([group['City'].iloc[0]] * len(future_X),
+                                              categories=group['City'].cat.categories)
             
         # Vectorized operations
         future_predictions = model.predict(future_X)
@@ -166,17 +191,12 @@ def calculate_metrics(y_test, y_pred, city):
         logger.error(f"Error calculating metrics: {e}")
         raise
 
-def calculate_initial_metrics(X_train, y_train, X_test, y_test, city):
+def calculate_initial_metrics(X_train, y_train, X_test, y_test, city, n_jobs=1):
     """Calculate metrics before validation/optimization with default model parameters"""
     try:
         logger.info(f"Calculating initial metrics for {city} with default parameters")
         # Train a model with default parameters but optimized for speed
-        default_model = xgb.XGBRegressor(
-            objective='reg:squarederror', 
-            n_jobs=1,
-            verbosity=0
-        )
-        default_model.fit(X_train, y_train)
+        default_model = train_model(X_train, y_train, n_jobs=n_jobs)
         
         # Predict and calculate metrics
         y_pred = default_model.predict(X_test)
@@ -286,10 +306,111 @@ def calculate_overall_prediction_rating(metrics_df):
             'avg_r2': 0
         }
 
-def process_city_data(city_data):
-    """Process data for a single city - extracted for parallel processing"""
+def warm_start_city(city, group, features, model, metadata, model_store, options, n_jobs=1):
+    """
+    Continue yesterday's booster on the rows added since it was trained.
+    Validation results and holdout metrics are carried over from the last full rebuild.
+    """
+    try:
+        tqdm.write(f"♻️ Updating yesterday's model for {city}")
+        # trained_through is the exact last timestamp the booster saw, so unchanged data has no new rows
+        trained_through = pd.Timestamp(metadata['trained_through'])
+        new_rows = group[group['Date'] > trained_through]
+
+        if new_rows.empty:
+            logger.info(f"{city}: no new rows since {metadata['trained_through']}, reusing stored model")
+            return build_stored_result(city, model, group, features, metadata)
+
+        # Score the new rows before learning from them - a genuine out-of-sample check
+        new_mae = mean_absolute_error(new_rows['Heat Index'], model.predict(new_rows[features]))
+        logger.info(f"{city}: stored model MAE on {len(new_rows)} new rows: {new_mae:.4f}")
+
+        model = continue_training(
+            model, new_rows[features], new_rows['Heat Index'],
+            metadata['best_params'], options.warm_start_rounds, n_jobs=n_jobs
+        )
+        metadata['trained_through'] = group['Date'].max().isoformat()
+        metadata['warm_start_rounds'] = metadata.get('warm_start_rounds', 0) + options.warm_start_rounds
+        model_store.save(city, model, metadata)
+
+        return build_stored_result(city, model, group, features, metadata)
+    except Exception as e:
+        logger.error(f"Error warm-starting model for {city}: {e}")
+        raise
+
+def build_stored_result(city, model, group, features, artifacts):
+    """Forecast with an already trained model and report the metrics stored alongside it"""
+    date_range = forecast_dates()
+    varied_predictions = make_predictions(model, group, date_range, features)
+    city_predictions = [{'City': city, 'Date': date, 'Predicted Heat Index': prediction}
+                        for date, prediction in zip(date_range, varied_predictions)]
+    return {
+        'city': city,
+        'predictions': city_predictions,
+        'metrics': artifacts['metrics'],
+        'initial_metrics': artifacts['initial_metrics'],
+        'validation_results': artifacts['validation_results']
+    }
+
+def forecast_dates():
+    """The 7 forecast days starting tomorrow"""
+    start_date = datetime.now() + timedelta(days=1)
+    return [start_date + timedelta(days=i) for i in range(7)]
+
+def process_city_data(city_data, cpu_budget=None, options=None, previous_tuning=None):
+    """
+    Process data for a single city - extracted for parallel processing
+
+    previous_tuning holds the city's parameters from the last audit; the forecast
+    stage trains with them and drift-triggered re-tuning checks them
+    """
     city, group = city_data
     try:
+        if cpu_budget is None:
+            cpu_budget = CPUBudget.from_env().plan(n_cities=1)
+        options = options or TrainingOptions.from_env()
+        xgb_threads = cpu_budget.xgb_threads
+
+        features = FEATURES
+        if options.stage == 'audit':
+            return audit_city_data(city, group, features, cpu_budget, options, previous_tuning)
+
+        # Unchanged rows, features and search space mean the previous run's model is still valid
+        model_cache = None
+        if options.use_cache:
+            model_cache = ModelCache(options.cache_dir, options.cache_max_age_days, options.cache_max_entries)
+            # Every input that changes what validation picks or how the model is fit: the
+            # profile's splits and grid, early stopping, and the tuning a run reuses
+            cache_key = ModelCache.fingerprint(group, features, 'Heat Index', {
+                'validation_profile': get_validation_profile(options.validation_profile).as_dict(),
+                'early_stopping_rounds': EARLY_STOPPING_ROUNDS,
+                'validation_deadline': options.validation_deadline,
+                'search_strategy': options.search_strategy,
+                'search_max_fits': options.search_max_fits,
+                'stage': options.stage,
+                'bootstrap_mode': options.bootstrap_mode,
+                'bootstrap_iterations': options.bootstrap_iterations,
+                'importance_method': options.importance_method,
+                'time_series_window': options.time_series_window,
+                'time_series_warm_start': options.time_series_warm_start,
+                'previous_tuning': {key: previous_tuning.get(key) for key in ('best_params', 'forward_mae')}
+                                   if previous_tuning else None
+            })
+            cached_model, cached_entry = model_cache.get(city, cache_key)
+            if cached_model is not None:
+                tqdm.write(f"⚡ Weather data for {city} unchanged, reusing cached model")
+                group = prepare_data_for_regression(group)
+                return build_stored_result(city, cached_model, group, features, cached_entry)
+
+        model_store = ModelStore(options.model_dir) if options.warm_start else None
+        if model_store is not None:
+            stored_model, metadata = model_store.load(city)
+            if stored_model is not None and not model_store.needs_full_rebuild(
+                    metadata, features, options.full_rebuild_days):
+                group = prepare_data_for_regression(group)
+                return warm_start_city(city, group, features, stored_model, metadata,
+                                       model_store, options, n_jobs=xgb_threads)
+
         # Use simplified, user-friendly messages
         tqdm.write(f"🏙️ Analyzing weather patterns for {city}")
         
@@ -298,10 +419,6 @@ def process_city_data(city_data):
             group = prepare_data_for_regression(group)
             pbar.update(1)
             
-            # Use the features available in the CSV
-            features = ['day', 'Temperature Max', 'Temperature Min', 'Apparent Temperature Max', 
-                       'Apparent Temperature Min', 'Wind Speed', 'Solar Radiation', 'Relative Humidity']
-            
             # Create a holdout validation set (10% of data)
             train_data, holdout_data = create_holdout_validation_set(group, test_size=0.1)
             pbar.update(1)
@@ -317,22 +434,40 @@ def process_city_data(city_data):
             pbar.update(1)
             
             # Calculate initial metrics with default model parameters
-            before_metrics = calculate_initial_metrics(X_train, y_train, X_test, y_test, city)
+            before_metrics = calculate_initial_metrics(X_train, y_train, X_test, y_test, city, n_jobs=xgb_threads)
             pbar.update(1)
             
-            # Perform comprehensive model validation
-            city_validation = validate_model(city, train_data, features)
-            
-            # Get the best parameters from nested CV
-            best_params = city_validation['nested_cv']['best_params']
+            if options.stage == 'forecast':
+                # Publish now with the last audited parameters (or XGBoost defaults); the audit runs separately
+                city_validation = None
+                best_params = previous_tuning['best_params'] if previous_tuning else None
+            else:
+                # Perform comprehensive model validation
+                city_validation = validate_model(
+                    city, train_data, features,
+                    cpu_budget=cpu_budget,
+                    search_strategy=options.search_strategy,
+                    max_fits=options.search_max_fits,
+                    study_path=options.study_path,
+                    previous_tuning=previous_tuning,
+                    bootstrap_mode=options.bootstrap_mode,
+                    bootstrap_iterations=options.bootstrap_iterations,
+                    importance_method=options.importance_method,
+                    time_series_window=options.time_series_window,
+                    time_series_warm_start=options.time_series_warm_start,
+                    profile=options.validation_profile,
+                    deadline_seconds=options.validation_deadline
+                )
+                
+                # Get the best parameters from nested CV
+                best_params = city_validation['nested_cv']['best_params']
             pbar.update(1)
             
             # Train final model with best parameters
-            model = train_model(X_train, y_train, best_params)
+            model = train_model(X_train, y_train, best_params, n_jobs=xgb_threads)
             
             # Make predictions for next 7 days
-            start_date = datetime.now() + timedelta(days=1)
-            date_range = [start_date + timedelta(days=i) for i in range(7)]
+            date_range = forecast_dates()
             varied_predictions = make_predictions(model, group, date_range, features)
             
             city_predictions = []
@@ -350,6 +485,27 @@ def process_city_data(city_data):
             
             # Get predictions for the test set
             y_pred = model.predict(X_test)
+
+            # A validation cut short by its deadline is redone next run instead of being cached
+            if model_cache is not None and not (city_validation or {}).get('truncated'):
+                model_cache.put(city, cache_key, model, {
+                    'best_params': best_params,
+                    'metrics': holdout_metrics,
+                    'initial_metrics': before_metrics,
+                    'validation_results': city_validation
+                })
+
+            if model_store is not None:
+                # Full rebuild: keep the booster so the next runs can continue from it
+                model_store.save(city, model, {
+                    'features': features,
+                    'best_params': best_params,
+                    'trained_through': group['Date'].max().isoformat(),
+                    'last_full_rebuild': datetime.now().strftime('%Y-%m-%d'),
+                    'metrics': holdout_metrics,
+                    'initial_metrics': before_metrics,
+                    'validation_results': city_validation
+                })
             
             return {
                 'city': city,
@@ -362,6 +518,176 @@ def process_city_data(city_data):
         tqdm.write(f"⚠️ Encountered an issue with {city}: {str(e).split(':')[0]}")
         return None
 
+def audit_city_data(city, group, features, cpu_budget, options, previous_tuning=None):
+    """Audit stage: run the validation suite on the same training rows the forecast stage uses"""
+    try:
+        tqdm.write(f"🔍 Auditing the forecast model for {city}")
+        group = prepare_data_for_regression(group)
+        train_data, _ = create_holdout_validation_set(group, test_size=0.1)
+        city_validation = validate_model(
+            city, train_data, features,
+            cpu_budget=cpu_budget,
+            search_strategy=options.search_strategy,
+            max_fits=options.search_max_fits,
+            study_path=options.study_path,
+            previous_tuning=previous_tuning if options.reuse_tuning else None,
+            bootstrap_mode=options.bootstrap_mode,
+            bootstrap_iterations=options.bootstrap_iterations,
+            importance_method=options.importance_method,
+            time_series_window=options.time_series_window,
+            time_series_warm_start=options.time_series_warm_start,
+            profile=options.validation_profile,
+            deadline_seconds=options.validation_deadline
+        )
+        return {'city': city, 'validation_results': city_validation}
+    except Exception as e:
+        logger.error(f"Error auditing model for {city}: {e}")
+        raise
+
+def process_shared_city(city, cpu_budget=None, options=None, previous_tuning=None):
+    """Process a city in a worker process using the memory-mapped shared dataset"""
+    group = get_worker_dataset().city_frame(city)
+    return process_city_data((city, group), cpu_budget, options, previous_tuning)
+
+def process_pooled_data(grouped, cpu_budget, options):
+    """
+    Train a single model across all cities with City as a native categorical feature.
+    Holdout, before/after metrics and forecasts are still produced per city.
+    Warm start, the model cache and tuning reuse apply to per-city training only,
+    so the pooled forecast stage trains with XGBoost defaults.
+    """
+    try:
+        tqdm.write(f"🌏 Training one pooled model for {len(grouped)} cities")
+        features = FEATURES + ['City']
+        categories = sorted(city for city, _ in grouped)
+        xgb_threads = cpu_budget.xgb_threads
+
+        prepared = {}
+        train_parts = []
+        holdout_parts = []
+        for city, group in grouped:
+            group = prepare_data_for_regression(group)
+            group['City'] = pd.Categorical(group['City'], categories=categories)
+            prepared[city] = group
+            # Same per-city 10% holdout as the per-city models
+            city_train, city_holdout = create_holdout_validation_set(group, test_size=0.1)
+            train_parts.append(city_train)
+            holdout_parts.append(city_holdout)
+        train_data = pd.concat(train_parts)
+        holdout_data = pd.concat(holdout_parts)
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            train_data[features], train_data['Heat Index'], test_size=0.2, random_state=42,
+            stratify=train_data['City']
+        )
+
+        pooled_validation = None
+        best_params = None
+        if options.stage != 'forecast':
+            # One validation battery for the pooled data instead of one per city; the
+            # validators' estimators take City as its integer category code
+            validation_data = train_data.copy()
+            validation_data['City'] = validation_data['City'].cat.codes
+            pooled_validation = validate_model(
+                'All cities (pooled)', validation_data, features,
+                cpu_budget=cpu_budget,
+                search_strategy=options.search_strategy,
+                max_fits=options.search_max_fits,
+                study_path=options.study_path,
+                bootstrap_mode=options.bootstrap_mode,
+                bootstrap_iterations=options.bootstrap_iterations,
+                importance_method=options.importance_method,
+                time_series_window=options.time_series_window,
+                time_series_warm_start=options.time_series_warm_start,
+                profile=options.validation_profile,
+                deadline_seconds=options.validation_deadline
+            )
+            best_params = pooled_validation['nested_cv']['best_params']
+        if options.stage == 'audit':
+            return [{'city': city, 'validation_results': {**pooled_validation, 'city': city, 'training_mode': 'pooled'}}
+                    for city in categories]
+
+        default_model = train_model(X_train, y_train, n_jobs=xgb_threads, enable_categorical=True)
+        y_pred_default = default_model.predict(X_test)
+
+        model = train_model(X_train, y_train, best_params, n_jobs=xgb_threads, enable_categorical=True)
+        y_pred_holdout = model.predict(holdout_data[features])
+
+        date_range = forecast_dates()
+        results = []
+        for city in categories:
+            test_mask = (X_test['City'] == city).to_numpy()
+            holdout_mask = (holdout_data['City'] == city).to_numpy()
+            varied_predictions = make_predictions(model, prepared[city], date_range, features)
+            results.append({
+                'city': city,
+                'predictions': [{'City': city, 'Date': date, 'Predicted Heat Index': prediction}
+                                for date, prediction in zip(date_range, varied_predictions)],
+                'metrics': calculate_metrics(holdout_data['Heat Index'][holdout_mask],
+                                             y_pred_holdout[holdout_mask], city),
+                'initial_metrics': calculate_metrics(y_test[test_mask], y_pred_default[test_mask],
+                                                     f"{city} (Before Validation)"),
+                'validation_results': ({**pooled_validation, 'city': city, 'training_mode': 'pooled'}
+                                       if pooled_validation else None)
+            })
+        return results
+    except Exception as e:
+        tqdm.write(f"⚠️ Encountered an issue with the pooled model: {str(e).split(':')[0]}")
+        logger.error(f"Error processing pooled model: {e}")
+        return []
+
+def run_city_workers(grouped, data, execution_mode, cpu_budget, options, previous_tuning):
+    """Train one model per city in a thread or process pool and return the per-city results"""
+    # Progress bar for overall city processing
+    with tqdm(total=len(grouped), desc="Analyzing cities", position=0) as main_pbar:
+        # Use parallel processing for city data
+        all_results = []
+        completed_cities = 0
+        shared_dataset = None
+        if execution_mode == 'process':
+            # Publish the data once; workers map it instead of unpickling a group per city
+            shared_dataset = SharedCityDataset.publish(data)
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=cpu_budget.city_workers,
+                initializer=attach_worker_dataset,
+                initargs=(shared_dataset.spec,)
+            )
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=cpu_budget.city_workers)
+        try:
+            with executor:
+                # Submit all tasks
+                if shared_dataset is not None:
+                    future_to_city = {executor.submit(process_shared_city, city, cpu_budget, options,
+                                                     previous_tuning.get(city)): city
+                                    for city in shared_dataset.cities}
+                else:
+                    future_to_city = {executor.submit(process_city_data, city_group, cpu_budget, options,
+                                                     previous_tuning.get(city_group[0])): city_group[0]
+                                    for city_group in grouped}
+
+                # Process results as they complete
+                for future in concurrent.futures.as_completed(future_to_city):
+                    city = future_to_city[future]
+                    try:
+                        result = future.result()
+                        if result:
+                            all_results.append(result)
+                            completed_cities += 1
+                            main_pbar.update(1)
+                            percent_complete = (completed_cities / len(grouped)) * 100
+                            main_pbar.set_description(f"Analyzing cities - {percent_complete:.1f}% done")
+                        else:
+                            main_pbar.update(1)
+                            tqdm.write(f"⚠️  Couldn't analyze {city}")
+                    except Exception as e:
+                        main_pbar.update(1)
+                        tqdm.write(f"❌ Problem with {city}: {str(e).split(':')[0]}")
+        finally:
+            if shared_dataset is not None:
+                shared_dataset.close()
+    return all_results
+
 def log_predictions(predictions_df, metrics_df, initial_metrics_df):
     try:
         logger.info("Logging predictions and metrics comparison")
@@ -414,8 +740,16 @@ def generate_forecast_json(predictions_df, overall_rating):
         logger.error(f"Error generating forecast JSON: {e}")
         return {"error": "Failed to generate forecast data"}
 
-def main():
+def main(execution_mode=None, cpu_budget=None, options=None):
     try:
+        options = options or TrainingOptions.from_env()
+        execution_mode = execution_mode or EXECUTION_MODE
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if options.time_series_warm_start and options.stage != 'forecast':
+            # Its splits disagree with the exact retrain; keep published time_cv numbers recognisable
+            logger.warning("--time-series-warm-start is exploratory: this run's time_cv results are flagged "
+                           "'exploratory' and are not comparable with exact runs")
         start_time = time.time()
         console_log("Starting heat index forecast preparation", True, "🌡️")
         
@@ -431,57 +765,50 @@ def main():
                 time.sleep(0.05)  # Small delay for smoother animation
                 pbar.update(5)
             
-            data = load_data(file_path)
-            pbar.update(25)
-            
             # Update required columns to match the CSV structure
             required_columns = {'City', 'Date', 'Temperature Max', 'Temperature Min', 'Apparent Temperature Max', 
                               'Apparent Temperature Min', 'Wind Speed', 'Solar Radiation', 'Relative Humidity', 
                               'Heat Index'}
             
-            # Rename 'City' column if it's actually named differently in the CSV
-            if 'City' not in data.columns and 'city' in data.columns:
-                data = data.rename(columns={'city': 'City'})
-                
-            pbar.update(10)
-            
-            data = check_required_columns(data, required_columns)
-            pbar.update(15)
+            # The weather store picks up a changed CSV (e.g. a fresh checkout), then serves
+            # only the cities and dates this run needs as a typed, read-only dataset
+            store = WeatherStore()
+            store.sync_from_csv(file_path)
+            pbar.update(25)
+            data = WeatherDataset.from_store(store, required_columns, cities=options.cities,
+                                             start=options.history_start)
+            if not len(data):
+                raise ValueError(f"No weather rows for cities {options.cities} from {options.history_start}")
+            pbar.update(25)
             
-            # Group data by city once
-            grouped = list(data.groupby('City'))
+            # One frame per city over the dataset's rows, without copying them
+            grouped = data.groups()
             pbar.update(20)
             
         console_log(f"Found weather data for {len(grouped)} cities", False, "🔍")
+
+        # Split the cores between city workers, search jobs and XGBoost threads;
+        # the pooled model is a single job that gets the whole machine
+        n_jobs = 1 if options.training_mode == 'pooled' else len(grouped)
+        cpu_budget = (cpu_budget or CPUBudget.from_env()).plan(n_cities=n_jobs)
+        logger.info(f"CPU budget plan: {cpu_budget.as_dict()}")
+        console_log(f"Using {cpu_budget.describe()}", False, "🧮")
+
+        # Modified output directory path to use public/data
+        output_dir = os.path.join(script_dir, '..', '..', 'public', 'data', 'predicted_heat_index')
+
+        # Last audit's tuned parameters: the forecast stage trains with them, and with
+        # --reuse-tuning nested CV only reruns for cities that drifted
+        if options.reuse_tuning or options.stage == 'forecast':
+            previous_tuning = load_previous_tuning(output_dir, options.training_mode)
+        else:
+            previous_tuning = {}
         console_log("Starting to analyze each city's weather patterns", False, "📊")
         
-        # Progress bar for overall city processing
-        with tqdm(total=len(grouped), desc="Analyzing cities", position=0) as main_pbar:
-            # Use parallel processing for city data
-            all_results = []
-            completed_cities = 0
-            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-                # Submit all tasks
-                future_to_city = {executor.submit(process_city_data, city_group): city_group[0] 
-                                for city_group in grouped}
-                
-                # Process results as they complete
-                for future in concurrent.futures.as_completed(future_to_city):
-                    city = future_to_city[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            all_results.append(result)
-                            completed_cities += 1
-                            main_pbar.update(1)
-                            percent_complete = (completed_cities / len(grouped)) * 100
-                            main_pbar.set_description(f"Analyzing cities - {percent_complete:.1f}% done")
-                        else:
-                            main_pbar.update(1)
-                            tqdm.write(f"⚠️  Couldn't analyze {city}")
-                    except Exception as e:
-                        main_pbar.update(1)
-                        tqdm.write(f"❌ Problem with {city}: {str(e).split(':')[0]}")
+        if options.training_mode == 'pooled':
+            all_results = process_pooled_data(grouped, cpu_budget, options)
+        else:
+            all_results = run_city_workers(grouped, data, execution_mode, cpu_budget, options, previous_tuning)
         
         # Collect all results
         console_log("Creating your forecasts", True, "📝")
@@ -493,27 +820,33 @@ def main():
             
             for result in all_results:
                 if result:
-                    predictions.extend(result['predictions'])
-                    metrics.append(result['metrics'])
-                    initial_metrics.append(result['initial_metrics'])
-                    validation_results.append(result['validation_results'])
+                    if options.stage != 'audit':
+                        predictions.extend(result['predictions'])
+                        metrics.append(result['metrics'])
+                        initial_metrics.append(result['initial_metrics'])
+                    if result.get('validation_results') is not None:
+                        validation_results.append(result['validation_results'])
             
             final_pbar.update(20)
             
             date_today = datetime.now().strftime('%Y-%m-%d')
             
-            # Modified output directory path to use public/data
-            output_dir = os.path.join(script_dir, '..', '..', 'public', 'data', 'predicted_heat_index')
             os.makedirs(output_dir, exist_ok=True)
             
             final_pbar.update(10)
-            save_predictions(predictions, os.path.join(output_dir, f'{date_today}_heat_index_prediction.csv'))
-            final_pbar.update(15)
             
-            # Save validation results
-            validation_output = os.path.join(output_dir, f'{date_today}_model_validation_results.json')
-            pd.DataFrame(validation_results).to_json(validation_output, orient='records')
+            # Save validation results (the forecast stage leaves them to the audit stage)
+            if options.stage != 'forecast':
+                validation_output = os.path.join(output_dir, f'{date_today}_model_validation_results.json')
+                pd.DataFrame(validation_results).to_json(validation_output, orient='records')
             final_pbar.update(10)
+
+            if options.stage == 'audit':
+                console_log(f"Model audit saved to {validation_output}", False, "💾")
+                return {'validation_results': validation_results}
+
+            save_predictions(predictions, os.path.join(output_dir, f'{date_today}_heat_index_prediction.csv'))
+            final_pbar.update(15)
             
             predictions_df = pd.DataFrame(predictions)
             # Format dates for the DataFrame if needed
@@ -595,7 +928,83 @@ def main():
 
 # Modified to return JSON when imported and called by other modules
 if __name__ == "__main__":
-    result = main()
+    parser = argparse.ArgumentParser(description='Train heat index models and generate the 7-day forecast')
+    parser.add_argument('--execution-mode', choices=EXECUTION_MODES, default=EXECUTION_MODE,
+                        help='Run city workers as threads or as processes sharing a memory-mapped dataset')
+    parser.add_argument('--cpus', type=int, help='Total cores to budget across all layers (default: all available)')
+    parser.add_argument('--city-workers', type=int, help='Number of cities processed concurrently')
+    parser.add_argument('--search-jobs', type=int, help='Parallel hyperparameter search fits per city')
+    parser.add_argument('--xgb-threads', type=int, help='Threads per XGBoost fit')
+    parser.add_argument('--warm-start', action='store_true', default=None,
+                        help="Continue each city's stored booster on new rows instead of retraining")
+    parser.add_argument('--full-rebuild-days', type=int,
+                        help='Days between full retrains when warm-starting (default: 7)')
+    parser.add_argument('--warm-start-rounds', type=int,
+                        help='Boosting rounds added per warm-start update (default: 10)')
+    parser.add_argument('--model-dir', help='Directory for stored per-city models')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', default=None,
+                        help='Retrain every city even if its data has not changed since a cached run')
+    parser.add_argument('--search-strategy', choices=sorted(SEARCH_ENGINES),
+                        help='Hyperparameter search engine used in nested CV (default: grid)')
+    parser.add_argument('--search-max-fits', type=int,
+                        help='Maximum search fits per outer fold of nested CV')
+    parser.add_argument('--stage', choices=STAGES,
+                        help="'forecast' trains with the last audited parameters and publishes immediately, "
+                             "'audit' runs only the validation suite, 'all' does both (default)")
+    parser.add_argument('--training-mode', choices=TRAINING_MODES,
+                        help='Train one model per city or one pooled model with City as a categorical feature')
+    parser.add_argument('--reuse-tuning', action='store_true', default=None,
+                        help="Reuse last run's best_params and rerun nested CV only for cities that fail a drift check")
+    parser.add_argument('--bootstrap-mode', choices=BOOTSTRAP_MODES,
+                        help="'exact' refits on resampled row copies (default); 'poisson' or 'multinomial' "
+                             "weight the rows of each bootstrap replicate instead")
+    parser.add_argument('--bootstrap-iterations', type=int, help="Bootstrap replicates per city (default: the validation profile's)")
+    parser.add_argument('--importance-method', choices=IMPORTANCE_METHODS,
+                        help="Feature importance: 'sklearn' in-sample permutation_importance (default), "
+                             "'batched' out-of-fold permutation, or 'shap' TreeSHAP contributions")
+    parser.add_argument('--validation-profile', choices=sorted(VALIDATION_PROFILES),
+                        help="Validator sizes: 'quick', 'standard' (default) or 'full' folds, search grid "
+                             "and bootstrap/permutation repeats")
+    parser.add_argument('--validation-deadline', type=float,
+                        help='Wall-clock seconds per city for validation; validators still pending when it '
+                             'runs out are cut short or skipped and reported as truncated')
+    parser.add_argument('--cities', nargs='+', help='Only train and forecast these cities (default: all)')
+    parser.add_argument('--history-start', help='Only train on rows dated from this YYYY-MM-DD on (default: all history)')
+    parser.add_argument('--time-series-window', choices=TIME_SERIES_WINDOWS,
+                        help="Time-based validation trains each split on all earlier rows ('expanding', default) "
+                             "or on a fixed window of the latest rows ('rolling')")
+    parser.add_argument('--time-series-warm-start', action='store_true', default=None,
+                        help="Exploratory: continue each expanding time-based split from the previous split's "
+                             "booster instead of retraining it; scores differ from the exact retrain")
+    args = parser.parse_args()
+    options = TrainingOptions.from_env(
+        warm_start=args.warm_start,
+        full_rebuild_days=args.full_rebuild_days,
+        warm_start_rounds=args.warm_start_rounds,
+        model_dir=args.model_dir,
+        use_cache=args.use_cache,
+        search_strategy=args.search_strategy,
+        search_max_fits=args.search_max_fits,
+        reuse_tuning=args.reuse_tuning,
+        training_mode=args.training_mode,
+        stage=args.stage,
+        bootstrap_mode=args.bootstrap_mode,
+        bootstrap_iterations=args.bootstrap_iterations,
+        importance_method=args.importance_method,
+        time_series_window=args.time_series_window,
+        time_series_warm_start=args.time_series_warm_start,
+        validation_profile=args.validation_profile,
+        validation_deadline=args.validation_deadline,
+        cities=args.cities,
+        history_start=args.history_start
+    )
+    cpu_budget = CPUBudget.from_env(
+        total_cores=args.cpus,
+        city_workers=args.city_workers,
+        search_jobs=args.search_jobs,
+        xgb_threads=args.xgb_threads
+    )
+    result = main(execution_mode=args.execution_mode, cpu_budget=cpu_budget, options=options)
 else:
     # If imported as a module, provide a function to get forecast data
     def get_forecast_data(data_file=None):
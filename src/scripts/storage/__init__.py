@@ -0,0 +1,17 @@
+# This file marks the storage directory as a Python package
+from .weather_store import (
+    WeatherStore, COLUMNS, FEATURE_COLUMNS, TABLES, DEFAULT_STORE_PATH, DEFAULT_CSV_PATH, DEFAULT_FEATURES_CSV_PATH,
+    DATE_FORMAT, parse_dates
+)
+
+__all__ = [
+    'WeatherStore',
+    'COLUMNS',
+    'FEATURE_COLUMNS',
+    'TABLES',
+    'DEFAULT_STORE_PATH',
+    'DEFAULT_CSV_PATH',
+    'DEFAULT_FEATURES_CSV_PATH',
+    'DATE_FORMAT',
+    'parse_dates'
+]
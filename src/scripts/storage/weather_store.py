@@ -0,0 +1,302 @@
+import os
+import csv
+import hashlib
+import sqlite3
+import pandas as pd
+from loguru import logger
+from functions.calculate_heat_index import HEAT_INDEX_THRESHOLDS
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Where the store lives; the CSV in public/data stays the published copy
+DEFAULT_STORE_PATH = os.environ.get('HEAT_INDEX_WEATHER_STORE',
+                                    os.path.join(script_dir, 'data', 'historical_weather.sqlite'))
+DEFAULT_CSV_PATH = os.path.join(script_dir, '..', '..', 'public', 'data', 'historical_weather_data.csv')
+DEFAULT_FEATURES_CSV_PATH = os.path.join(script_dir, '..', '..', 'public', 'data', 'historical_weather_features.csv')
+
+# Format of the stored date text, e.g. 2023-04-18 16:00:00+00:00 (UTC start of a local day)
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S%z'
+
+# CSV header -> table column, in CSV order
+COLUMNS = {
+    'City': 'city',
+    'Date': 'date',
+    'Temperature Max': 'temperature_max',
+    'Temperature Min': 'temperature_min',
+    'Apparent Temperature Max': 'apparent_temperature_max',
+    'Apparent Temperature Min': 'apparent_temperature_min',
+    'Wind Speed': 'wind_speed',
+    'Solar Radiation': 'solar_radiation',
+    'Relative Humidity': 'relative_humidity',
+    'Heat Index': 'heat_index'
+}
+
+# Per-day aggregates of the hourly data, kept beside the daily rows under the same (City, Date)
+FEATURE_COLUMNS = {
+    'City': 'city',
+    'Date': 'date',
+    'Max Hourly Heat Index': 'max_hourly_heat_index',
+    'Mean Hourly Heat Index': 'mean_hourly_heat_index',
+    **{f'Hours Heat Index {threshold}+': f'hours_heat_index_{threshold}' for threshold in HEAT_INDEX_THRESHOLDS},
+    'Max Hourly Temperature': 'max_hourly_temperature',
+    'Humidity At Max Temperature': 'humidity_at_max_temperature'
+}
+
+# Table -> its columns; every table has one row per (city, date)
+TABLES = {
+    'daily_weather': COLUMNS,
+    'daily_features': FEATURE_COLUMNS
+}
+
+def parse_dates(dates):
+    """Stored date text as naive UTC datetimes; text in any other format becomes NaT"""
+    return pd.to_datetime(pd.Series(dates, dtype=str), format=DATE_FORMAT, errors='coerce').dt.tz_localize(None)
+
+class WeatherStore:
+    """
+    SQLite store of the daily historical weather rows, one row per (City, Date).
+
+    The (city, date) index keeps each city's rows together in date order, so
+    reads filtered by city and date range touch only those rows, and writes
+    add or replace single rows instead of rewriting the file. Dates are kept
+    as the text the rows arrived with; ISO dates and timestamps compare
+    correctly as text, so date bounds may be given as 'YYYY-MM-DD'.
+    export_csv writes historical_weather_data.csv for the web front end.
+    Every method takes a `table`: daily_weather (the default) or
+    daily_features, the hourly aggregates with their own CSV.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            for table, table_columns in TABLES.items():
+                columns = ',\n'.join(f"{column} REAL" for column in list(table_columns.values())[2:])
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        city TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        {columns},
+                        UNIQUE (city, date)
+                    )
+                """)
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        # Ingest and training may run at once, so wait for locks instead of failing
+        return sqlite3.connect(self.path, timeout=60)
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM daily_weather").fetchone()[0]
+
+    def cities(self):
+        with self._connect() as conn:
+            return [city for city, in conn.execute("SELECT DISTINCT city FROM daily_weather ORDER BY city")]
+
+    def latest_dates(self, table='daily_weather'):
+        """
+        Each city's latest stored date text, per date format: the last full
+        timestamp and the last bare 'YYYY-MM-DD' date (None when a city has none)
+        """
+        query = f"""
+            SELECT city, MAX(CASE WHEN length(date) > 10 THEN date END), MAX(CASE WHEN length(date) <= 10 THEN date END)
+            FROM {table} GROUP BY city
+        """
+        with self._connect() as conn:
+            return {city: (timestamp, day) for city, timestamp, day in conn.execute(query)}
+
+    def write(self, rows, table='daily_weather'):
+        """
+        Insert or update rows (a DataFrame with the CSV columns, or sequences in
+        CSV column order) in one transaction. A row whose (City, Date) is already
+        stored replaces its values but keeps its place in the export order.
+        """
+        try:
+            values = self._values(rows, table)
+            with self._connect() as conn:
+                self._upsert(conn, values, table)
+            logger.info(f"Wrote {len(values)} rows to {table} in weather store {self.path}")
+            return len(values)
+        except Exception as e:
+            logger.error(f"Error writing to weather store: {e}")
+            raise
+
+    def append(self, rows, csv_path=DEFAULT_CSV_PATH, table='daily_weather', replaces=()):
+        """
+        Upsert rows and add them to the end of the CSV without rewriting it.
+
+        Rows whose (City, Date) is already stored with the same values are
+        skipped, so rerunning a day changes nothing. New rows are appended to
+        the CSV in one write and the store transaction commits only after it
+        succeeded; any failure truncates the CSV back to its previous size.
+        Only when a stored day comes back with different values, or the CSV
+        is not the one the store last saw, is the whole CSV exported instead.
+        replaces holds (City, Date) keys of rows these rows supersede under
+        other date text, e.g. bare dates fetched again as timestamps; those
+        still stored are deleted and the CSV is exported without them.
+        Returns the number of rows added or changed.
+        """
+        try:
+            values = self._values(rows, table)
+            with self._connect() as conn:
+                stored = self._stored_rows(conn, [row[:2] for row in values], table)
+                new_rows = [row for row in values if row[:2] not in stored]
+                changed = [row for row in values if row[:2] in stored and stored[row[:2]] != row]
+                replaced = list(self._stored_rows(conn, [(str(city), str(day)) for city, day in replaces], table))
+                if not new_rows and not changed and not replaced:
+                    logger.info(f"All {len(values)} rows are already in the weather store, nothing to write")
+                    return 0
+                rewrite = bool(changed) or bool(replaced) or not os.path.exists(csv_path) \
+                    or self._get_meta(f'csv_signature:{table}') != self._signature(csv_path)
+                if rewrite:
+                    conn.executemany(f"DELETE FROM {table} WHERE city = ? AND date = ?", replaced)
+                    self._upsert(conn, new_rows + changed, table)
+            if rewrite:
+                logger.info(f"{len(changed)} stored rows changed and {len(replaced)} replaced, rewriting {csv_path}")
+                self.export_csv(csv_path, table)
+                return len(new_rows) + len(changed)
+
+            size = os.path.getsize(csv_path)
+            conn = self._connect()
+            try:
+                self._upsert(conn, new_rows, table)
+                with open(csv_path, 'a', newline='') as f:
+                    csv.writer(f).writerows(new_rows)
+                    f.flush()
+                    os.fsync(f.fileno())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                os.truncate(csv_path, size)
+                raise
+            finally:
+                conn.close()
+            self._set_meta(f'csv_signature:{table}', self._signature(csv_path))
+            logger.info(f"Appended {len(new_rows)} rows to {csv_path}")
+            return len(new_rows)
+        except Exception as e:
+            logger.error(f"Error appending to weather store: {e}")
+            raise
+
+    def read(self, cities=None, start=None, end=None, table='daily_weather'):
+        """
+        Rows as a DataFrame with the CSV columns, optionally only for some
+        cities and for dates in [start, end] ('YYYY-MM-DD' or full timestamps)
+        """
+        try:
+            clauses, params = [], []
+            if cities is not None:
+                cities = list(cities)
+                clauses.append(f"city IN ({', '.join('?' * len(cities))})")
+                params.extend(cities)
+            if start is not None:
+                clauses.append("date >= ?")
+                params.append(str(start))
+            if end is not None:
+                # A bare end date includes that whole day's timestamps
+                clauses.append("date <= ?" if len(str(end)) > 10 else "substr(date, 1, 10) <= ?")
+                params.append(str(end))
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            query = f"SELECT {', '.join(TABLES[table].values())} FROM {table} {where} ORDER BY rowid"
+            with self._connect() as conn:
+                data = pd.read_sql_query(query, conn, params=params)
+            data.columns = list(TABLES[table])
+            logger.info(f"Read {len(data)} rows from {table} in weather store")
+            return data
+        except Exception as e:
+            logger.error(f"Error reading weather store: {e}")
+            raise
+
+    def import_csv(self, csv_path=DEFAULT_CSV_PATH, table='daily_weather'):
+        """Load every row of a historical_weather_data.csv, keeping its text dates and row order"""
+        # round_trip parsing so an import followed by an export reproduces the file
+        data = pd.read_csv(csv_path, dtype={'City': str, 'Date': str}, float_precision='round_trip')
+        data = data.rename(columns={'city': 'City'})
+        count = self.write(data, table)
+        self._set_meta(f'csv_signature:{table}', self._signature(csv_path))
+        return count
+
+    def sync_from_csv(self, csv_path=DEFAULT_CSV_PATH, table='daily_weather'):
+        """
+        Import the CSV when it changed since the store last imported or
+        exported it, e.g. in a fresh checkout or after the committed CSV was
+        updated; returns whether it imported
+        """
+        if not os.path.exists(csv_path) or self._get_meta(f'csv_signature:{table}') == self._signature(csv_path):
+            return False
+        logger.info(f"{csv_path} changed since the weather store last saw it, importing it")
+        self.import_csv(csv_path, table)
+        return True
+
+    def export_csv(self, csv_path=DEFAULT_CSV_PATH, table='daily_weather'):
+        """
+        Write every stored row to the front end's CSV: cities in the order they
+        were first stored, each city's rows in the order they were stored, so
+        a day appended for a city lands at the end of that city's block
+        """
+        try:
+            temp_path = f"{csv_path}.tmp"
+            columns = ', '.join(f"{table}.{column}" for column in TABLES[table].values())
+            query = f"""
+                WITH first_rows AS (SELECT city, MIN(rowid) AS first_row FROM {table} GROUP BY city)
+                SELECT {columns} FROM {table} JOIN first_rows USING (city)
+                ORDER BY first_rows.first_row, {table}.rowid
+            """
+            with self._connect() as conn, open(temp_path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(list(TABLES[table]))
+                writer.writerows(conn.execute(query))
+            os.replace(temp_path, csv_path)
+            self._set_meta(f'csv_signature:{table}', self._signature(csv_path))
+            logger.info(f"Exported {table} to {csv_path}")
+        except Exception as e:
+            logger.error(f"Error exporting weather store to CSV: {e}")
+            raise
+
+    @staticmethod
+    def _values(rows, table='daily_weather'):
+        """Rows (a DataFrame with the CSV columns, or sequences in CSV order) as store tuples"""
+        if isinstance(rows, pd.DataFrame):
+            rows = rows[list(TABLES[table])].itertuples(index=False, name=None)
+        return [(str(row[0]), str(row[1]), *(None if pd.isna(value) else float(value) for value in row[2:]))
+                for row in rows]
+
+    @staticmethod
+    def _upsert(conn, values, table='daily_weather'):
+        names = list(TABLES[table].values())
+        updates = ', '.join(f"{name} = excluded.{name}" for name in names[2:])
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT (city, date) DO UPDATE SET {updates}",
+            values
+        )
+
+    @staticmethod
+    def _stored_rows(conn, keys, table='daily_weather'):
+        """Stored rows for the given (city, date) keys, looked up through the unique index"""
+        query = f"SELECT {', '.join(TABLES[table].values())} FROM {table} WHERE city = ? AND date = ?"
+        stored = {}
+        for key in set(keys):
+            row = conn.execute(query, key).fetchone()
+            if row is not None:
+                stored[key] = row
+        return stored
+
+    @staticmethod
+    def _signature(path):
+        """Hash of the file's contents, so a fresh checkout of an unchanged CSV still matches a restored store"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _get_meta(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, value))
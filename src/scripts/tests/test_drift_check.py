@@ -0,0 +1,76 @@
+import json
+import numpy as np
+import pandas as pd
+
+from validation.drift_check import check_drift, feature_shifts, forward_window_mae, load_previous_tuning
+
+FEATURES = ['Temperature Max', 'Wind Speed', 'day']
+PARAMS = {'n_estimators': 50, 'max_depth': 3, 'learning_rate': 0.1}
+
+def city_data(days=730, wind_shift=0.0, seed=0):
+    """Two years of seasonal daily rows; wind_shift moves the last 30 days' Wind Speed"""
+    rng = np.random.RandomState(seed)
+    dates = pd.date_range('2023-01-01', periods=days, freq='D')
+    season = np.sin(2 * np.pi * dates.dayofyear / 365)
+    data = pd.DataFrame({
+        'Date': dates,
+        'Temperature Max': 31 + 2 * season + rng.randn(days),
+        'Wind Speed': 12 + 3 * season + 2 * rng.randn(days),
+        'day': np.arange(days)
+    })
+    data.loc[data.index[-30:], 'Wind Speed'] += wind_shift
+    data['Heat Index'] = data['Temperature Max'] * 1.2 + 0.1 * data['Wind Speed'] + 0.3 * rng.randn(days)
+    return data
+
+def test_feature_shifts_are_measured_in_history_standard_deviations():
+    history = pd.DataFrame({'x': [0.0, 2.0] * 50})
+    reference = pd.DataFrame({'x': [1.0] * 10})
+    recent = pd.DataFrame({'x': [2.5] * 10})
+    assert feature_shifts(recent, reference, history, ['x'])['x'] == 1.5
+
+def test_yearly_noise_stays_under_the_threshold():
+    result = check_drift(city_data(), FEATURES, 'Heat Index', PARAMS, reference_mae=100)
+    assert result['shifted_features'] == []
+    assert max(result['feature_shifts'].values()) < 1.0
+    assert not result['drifted']
+
+def test_large_shift_is_flagged():
+    # About 2.7 standard deviations of the wind history
+    result = check_drift(city_data(wind_shift=7.5), FEATURES, 'Heat Index', PARAMS, reference_mae=100)
+    assert result['shifted_features'] == ['Wind Speed']
+    assert result['drifted']
+
+def test_shift_threshold_is_respected():
+    data = city_data(wind_shift=7.5)
+    shift = check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=100)['feature_shifts']['Wind Speed']
+    assert not check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=100,
+                           shift_threshold=shift + 0.01)['drifted']
+
+def test_forward_mae_is_compared_with_tolerance():
+    data = city_data()
+    forward_mae = forward_window_mae(data, FEATURES, 'Heat Index', PARAMS)
+    assert not check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=forward_mae)['drifted']
+    assert not check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=forward_mae / 1.2)['drifted']
+    assert check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=forward_mae / 1.3)['drifted']
+    assert check_drift(data, FEATURES, 'Heat Index', PARAMS, reference_mae=None)['drifted']
+
+def test_previous_tuning_reads_forward_mae_from_validation_results(tmp_path):
+    records = [{'city': 'Alfonso', 'nested_cv': {'best_params': PARAMS, 'mean_mse': 0.5, 'forward_mae': 0.4}}]
+    (tmp_path / '2026-10-16_model_validation_results.json').write_text(json.dumps(records))
+    previous = load_previous_tuning(str(tmp_path))
+    assert previous['Alfonso']['forward_mae'] == 0.4
+    assert previous['Alfonso']['best_params'] == PARAMS
+
+def test_previous_tuning_skips_pooled_records(tmp_path):
+    per_city = [{'city': 'Alfonso', 'nested_cv': {'best_params': PARAMS, 'forward_mae': 0.4}},
+                {'city': 'Amadeo', 'nested_cv': {'best_params': PARAMS, 'forward_mae': 0.3}}]
+    pooled_params = {**PARAMS, 'max_depth': 5}
+    pooled = [{'city': city, 'training_mode': 'pooled',
+               'nested_cv': {'best_params': pooled_params, 'forward_mae': 0.055}} for city in ('Alfonso', 'Amadeo')]
+    (tmp_path / '2026-10-15_model_validation_results.json').write_text(json.dumps(per_city))
+    (tmp_path / '2026-10-16_model_validation_results.json').write_text(json.dumps(pooled))
+
+    previous = load_previous_tuning(str(tmp_path))
+    assert previous['Alfonso'] == {'best_params': PARAMS, 'mean_mse': None, 'std_mse': None, 'forward_mae': 0.4}
+    assert previous['Amadeo']['forward_mae'] == 0.3
+    assert load_previous_tuning(str(tmp_path), 'pooled')['Alfonso']['best_params'] == pooled_params
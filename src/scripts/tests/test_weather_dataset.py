@@ -0,0 +1,31 @@
+import numpy as np
+
+from storage import WeatherStore, COLUMNS
+from training import WeatherDataset
+
+HEADER = ','.join(COLUMNS)
+
+def write_csv(path, rows):
+    path.write_text('\n'.join([HEADER, *(','.join(map(str, row)) for row in rows)]) + '\n')
+
+def test_rows_with_bare_dates_are_dropped(tmp_path):
+    csv_path = tmp_path / 'historical_weather_data.csv'
+    write_csv(csv_path, [
+        ('Alfonso', '2025-04-16 16:00:00+00:00', 30, 24, 36, 27, 12, 20, 80, 35),
+        ('Alfonso', '2025-04-17 16:00:00+00:00', 31, 25, 37, 28, 11, 21, 78, 36),
+        # Fahrenheit row of an older daily run, with a bare date
+        ('Alfonso', '2025-04-19', 88, 75, 99, 80, 7, 20, 75, 650),
+        ('Amadeo', '2025-04-18', 87, 74, 98, 79, 6, 19, 76, 640),
+        ('Naic', '2025-04-17 16:00:00+00:00', 32, 26, 38, 29, 13, 22, 77, 37)
+    ])
+    store = WeatherStore(str(tmp_path / 'weather.sqlite'))
+    store.import_csv(str(csv_path))
+
+    dataset = WeatherDataset.from_store(store)
+
+    assert len(dataset) == 3
+    assert dataset.cities == ['Alfonso', 'Naic']
+    assert not np.isnat(dataset.dates).any()
+    frame = dataset.city_frame('Alfonso')
+    assert frame['Heat Index'].tolist() == [35, 36]
+    assert frame['Date'].dt.strftime('%Y-%m-%d %H:%M').tolist() == ['2025-04-16 16:00', '2025-04-17 16:00']
@@ -0,0 +1,22 @@
+import os
+
+from storage import WeatherStore
+from .test_weather_dataset import write_csv
+
+ROWS = [('Alfonso', '2025-04-16 16:00:00+00:00', 30, 24, 36, 27, 12, 20, 80, 35),
+        ('Alfonso', '2025-04-17 16:00:00+00:00', 31, 25, 37, 28, 11, 21, 78, 36)]
+
+def test_sync_skips_a_checked_out_copy_of_the_same_csv(tmp_path):
+    csv_path = tmp_path / 'historical_weather_data.csv'
+    write_csv(csv_path, ROWS)
+    store = WeatherStore(str(tmp_path / 'weather.sqlite'))
+    assert store.sync_from_csv(str(csv_path))
+
+    # A fresh checkout rewrites the file with a new modification time but the same contents
+    write_csv(csv_path, ROWS)
+    os.utime(csv_path, (1, 1))
+    assert not store.sync_from_csv(str(csv_path))
+
+    write_csv(csv_path, [ROWS[0], ROWS[1][:-1] + (37,)])
+    assert store.sync_from_csv(str(csv_path))
+    assert store.read()['Heat Index'].tolist() == [35, 37]
@@ -0,0 +1,20 @@
+# This file marks the training directory as a Python package
+from .cpu_budget import CPUBudget
+from .model_cache import ModelCache
+from .model_store import ModelStore
+from .shared_dataset import SharedCityDataset, attach_worker_dataset, get_worker_dataset
+from .weather_dataset import WeatherDataset
+from .training_options import TrainingOptions, STAGES, TRAINING_MODES
+
+__all__ = [
+    'CPUBudget',
+    'ModelCache',
+    'ModelStore',
+    'SharedCityDataset',
+    'attach_worker_dataset',
+    'get_worker_dataset',
+    'WeatherDataset',
+    'TrainingOptions',
+    'STAGES',
+    'TRAINING_MODES'
+]
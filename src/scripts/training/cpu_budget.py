@@ -0,0 +1,71 @@
+import os
+import multiprocessing
+from loguru import logger
+
+class CPUBudget:
+    """
+    Splits the available cores between the nested parallel layers:
+    city workers, hyperparameter search jobs and XGBoost threads, so that
+    city_workers * search_jobs * xgb_threads matches the machine
+    """
+
+    ENV_VARS = {
+        'total_cores': 'HEAT_INDEX_CPUS',
+        'city_workers': 'HEAT_INDEX_CITY_WORKERS',
+        'search_jobs': 'HEAT_INDEX_SEARCH_JOBS',
+        'xgb_threads': 'HEAT_INDEX_XGB_THREADS'
+    }
+
+    def __init__(self, total_cores=None, city_workers=None, search_jobs=None, xgb_threads=None):
+        self.total_cores = total_cores
+        self.city_workers = city_workers
+        self.search_jobs = search_jobs
+        self.xgb_threads = xgb_threads
+
+    @staticmethod
+    def available_cores():
+        """Cores this process may run on (respects CPU affinity where supported)"""
+        if hasattr(os, 'sched_getaffinity'):
+            return len(os.sched_getaffinity(0))
+        return multiprocessing.cpu_count()
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Build a budget from HEAT_INDEX_* environment variables; non-None overrides (CLI flags) win"""
+        values = {}
+        for field, env_var in cls.ENV_VARS.items():
+            value = overrides.get(field)
+            if value is None and os.environ.get(env_var):
+                value = int(os.environ[env_var])
+            values[field] = value
+        return cls(**values)
+
+    def plan(self, n_cities=1):
+        """Resolve unset layers for a run over n_cities and return the resulting budget"""
+        total = self.total_cores or self.available_cores()
+        city_workers = self.city_workers or max(1, min(n_cities, total))
+        per_worker = max(1, total // city_workers)
+        search_jobs = self.search_jobs or min(4, per_worker)
+        xgb_threads = self.xgb_threads or max(1, per_worker // search_jobs)
+
+        budget = CPUBudget(total, city_workers, search_jobs, xgb_threads)
+        if budget.total_concurrency > total:
+            logger.warning(f"CPU budget oversubscribed: {budget.describe()}")
+        return budget
+
+    @property
+    def total_concurrency(self):
+        return (self.city_workers or 1) * (self.search_jobs or 1) * (self.xgb_threads or 1)
+
+    def as_dict(self):
+        return {
+            'total_cores': self.total_cores,
+            'city_workers': self.city_workers,
+            'search_jobs': self.search_jobs,
+            'xgb_threads': self.xgb_threads
+        }
+
+    def describe(self):
+        return (f"{self.total_cores} cores -> {self.city_workers} city workers x "
+                f"{self.search_jobs} search jobs x {self.xgb_threads} XGBoost threads "
+                f"= {self.total_concurrency}")
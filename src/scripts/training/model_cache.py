@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+import xgboost as xgb
+from loguru import logger
+
+from .model_store import city_slug, to_json_safe
+
+# Bump when training or validation changes in a way that invalidates cached artifacts
+CACHE_VERSION = 3
+
+class ModelCache:
+    """
+    Persistent cache of trained city models keyed by a fingerprint of the
+    city's rows, the feature list and the training settings, which include
+    the validation profile, early stopping and any reused tuning.
+    A hit returns the booster with its best_params, metrics and validation
+    results so the city can be forecast without retraining.
+    """
+
+    def __init__(self, directory, max_age_days=14, max_entries_per_city=3):
+        self.directory = directory
+        self.max_age_days = max_age_days
+        self.max_entries_per_city = max_entries_per_city
+
+    @staticmethod
+    def fingerprint(group, features, target, params):
+        """SHA-256 over the city's raw rows, the features, the target and the training settings in params"""
+        columns = ['Date'] + [column for column in features if column in group.columns] + [target]
+        row_hashes = pd.util.hash_pandas_object(group[columns], index=False).to_numpy()
+        digest = hashlib.sha256(row_hashes.tobytes())
+        digest.update(json.dumps({
+            'version': CACHE_VERSION,
+            'features': list(features),
+            'target': target,
+            'params': params
+        }, sort_keys=True, default=to_json_safe).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _city_dir(self, city):
+        return os.path.join(self.directory, city_slug(city))
+
+    def _paths(self, city, key):
+        city_dir = self._city_dir(city)
+        return os.path.join(city_dir, f'{key}.json'), os.path.join(city_dir, f'{key}.meta.json')
+
+    def _is_expired(self, path):
+        return (time.time() - os.path.getmtime(path)) > self.max_age_days * 86400
+
+    def get(self, city, key):
+        """Return (model, entry) for a fingerprint, or (None, None) on a miss"""
+        model_path, meta_path = self._paths(city, key)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)) or self._is_expired(meta_path):
+            return None, None
+        try:
+            with open(meta_path, 'r') as f:
+                entry = json.load(f)
+            model = xgb.XGBRegressor()
+            model.load_model(model_path)
+            logger.info(f"Model cache hit for {city} ({key[:12]})")
+            return model, entry
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry for {city}: {e}")
+            return None, None
+
+    def put(self, city, key, model, entry):
+        try:
+            model_path, meta_path = self._paths(city, key)
+            os.makedirs(os.path.dirname(model_path), exist_ok=True)
+            model.save_model(model_path)
+            # Metadata is written last, so a half-written entry never looks like a hit
+            with open(meta_path, 'w') as f:
+                json.dump(entry, f, indent=2, default=to_json_safe)
+            logger.info(f"Cached model for {city} ({key[:12]})")
+            self.evict(city)
+        except Exception as e:
+            logger.warning(f"Could not cache model for {city}: {e}")
+
+    def evict(self, city):
+        """Drop a city's entries older than max_age_days and all but the newest max_entries_per_city"""
+        city_dir = self._city_dir(city)
+        if not os.path.isdir(city_dir):
+            return
+        meta_files = sorted(
+            (os.path.join(city_dir, name) for name in os.listdir(city_dir) if name.endswith('.meta.json')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for index, meta_path in enumerate(meta_files):
+            if index >= self.max_entries_per_city or self._is_expired(meta_path):
+                model_path = meta_path[:-len('.meta.json')] + '.json'
+                for path in (meta_path, model_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                logger.info(f"Evicted cache entry {os.path.basename(model_path)} for {city}")
@@ -0,0 +1,66 @@
+import os
+import re
+import json
+from datetime import datetime
+import xgboost as xgb
+from loguru import logger
+
+def city_slug(city):
+    """Filesystem-safe name for a city"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', city).strip('_').lower()
+
+def to_json_safe(value):
+    """json.dump fallback for numpy scalars and timestamps"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class ModelStore:
+    """
+    Keeps each city's final booster and its training metadata between runs,
+    so the next run can continue boosting instead of retraining from scratch
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, city):
+        slug = city_slug(city)
+        return (os.path.join(self.directory, f'{slug}.json'),
+                os.path.join(self.directory, f'{slug}.meta.json'))
+
+    def load(self, city):
+        """Return (model, metadata) for a city, or (None, None) if nothing usable is stored"""
+        model_path, meta_path = self._paths(city)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path, 'r') as f:
+                metadata = json.load(f)
+            model = xgb.XGBRegressor()
+            model.load_model(model_path)
+            return model, metadata
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable stored model for {city}: {e}")
+            return None, None
+
+    def save(self, city, model, metadata):
+        try:
+            model_path, meta_path = self._paths(city)
+            model.save_model(model_path)
+            with open(meta_path, 'w') as f:
+                json.dump(metadata, f, indent=2, default=to_json_safe)
+            logger.info(f"Stored model for {city} trained through {metadata.get('trained_through')}")
+        except Exception as e:
+            logger.error(f"Error storing model for {city}: {e}")
+            raise
+
+    @staticmethod
+    def needs_full_rebuild(metadata, features, full_rebuild_days, today=None):
+        """A stored model is only continued while its features match and its last rebuild is recent enough"""
+        if metadata.get('features') != list(features):
+            return True
+        last_rebuild = datetime.strptime(metadata['last_full_rebuild'], '%Y-%m-%d')
+        today = today or datetime.now()
+        return (today - last_rebuild).days >= full_rebuild_days
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .weather_dataset import WeatherDataset
+
+# Dataset mapped into a worker process by attach_worker_dataset
+_worker_dataset = None
+
+class SharedCityDataset:
+    """
+    Columnar copy of the historical weather data that worker processes
+    memory-map, so the parent loads the CSV once and no city group is
+    pickled across the process boundary
+    """
+
+    def __init__(self, directory, columns, offsets, owner=False, categories=None):
+        self.directory = directory
+        self.columns = columns
+        self.offsets = offsets
+        # City categories of a categorical City column, so worker frames keep its dtype
+        self.categories = categories
+        self._owner = owner
+        self._arrays = {}
+
+    @classmethod
+    def publish(cls, data, directory=None):
+        """
+        Write every column of data (a DataFrame or a WeatherDataset) to a
+        memory-mappable .npy file, one contiguous block per city
+        """
+        try:
+            directory = directory or tempfile.mkdtemp(prefix='heat_index_dataset_')
+            if isinstance(data, WeatherDataset):
+                # Already sorted by city and date with known offsets
+                offsets = data.offsets
+                categories = list(data.cities)
+                column_arrays = data.column_arrays()
+            else:
+                data = data.sort_values(by=['City', 'Date'])
+
+                # Rows are sorted by city, so each city is a contiguous [start, stop) range
+                city_values = data['City'].to_numpy()
+                cities, starts = np.unique(city_values, return_index=True)
+                stops = np.append(starts[1:], len(city_values))
+                offsets = {city: (int(start), int(stop)) for city, start, stop in zip(cities, starts, stops)}
+                is_categorical = isinstance(data['City'].dtype, pd.CategoricalDtype)
+                categories = list(data['City'].cat.categories) if is_categorical else None
+                column_arrays = ((column, data[column].to_numpy()) for column in data.columns if column != 'City')
+
+            columns = []
+            for column, values in column_arrays:
+                if values.dtype == object:
+                    logger.warning(f"Skipping non-numeric column {column} in shared dataset")
+                    continue
+                np.save(os.path.join(directory, f'{len(columns)}.npy'), np.ascontiguousarray(values))
+                columns.append(column)
+
+            n_rows = sum(stop - start for start, stop in offsets.values())
+            logger.info(f"Published {n_rows} rows for {len(offsets)} cities to {directory}")
+            return cls(directory, columns, offsets, owner=True, categories=categories)
+        except Exception as e:
+            logger.error(f"Error publishing shared dataset: {e}")
+            raise
+
+    @classmethod
+    def attach(cls, spec):
+        """Map a dataset published by another process from its spec"""
+        return cls(spec['directory'], spec['columns'], spec['offsets'], categories=spec.get('categories'))
+
+    @property
+    def spec(self):
+        """Small picklable description handed to worker processes"""
+        return {'directory': self.directory, 'columns': self.columns, 'offsets': self.offsets,
+                'categories': self.categories}
+
+    @property
+    def cities(self):
+        return list(self.offsets)
+
+    def _column(self, index):
+        if index not in self._arrays:
+            path = os.path.join(self.directory, f'{index}.npy')
+            self._arrays[index] = np.load(path, mmap_mode='r')
+        return self._arrays[index]
+
+    def city_frame(self, city):
+        """
+        Build the DataFrame for one city from its slice of the mapped columns;
+        City has the dtype it was published with, as in the parent's frames
+        """
+        start, stop = self.offsets[city]
+        frame = pd.DataFrame({
+            column: np.array(self._column(i)[start:stop]) for i, column in enumerate(self.columns)
+        })
+        if self.categories is not None:
+            codes = np.full(stop - start, self.categories.index(city), dtype=np.int32)
+            frame.insert(0, 'City', pd.Categorical.from_codes(codes, categories=self.categories))
+        else:
+            frame.insert(0, 'City', city)
+        return frame
+
+    def close(self):
+        """Release the mapped columns and remove the files if this process published them"""
+        self._arrays.clear()
+        if self._owner:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def attach_worker_dataset(spec):
+    """Process pool initializer that maps the published dataset into the worker"""
+    global _worker_dataset
+    _worker_dataset = SharedCityDataset.attach(spec)
+
+def get_worker_dataset():
+    if _worker_dataset is None:
+        raise RuntimeError("No shared dataset attached to this worker")
+    return _worker_dataset
@@ -0,0 +1,93 @@
+import os
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+# One model per city, or one model across all cities with City as a categorical feature
+TRAINING_MODES = ('per_city', 'pooled')
+
+# 'forecast' publishes with stored parameters, 'audit' only runs the validation suite
+STAGES = ('all', 'forecast', 'audit')
+
+class TrainingOptions:
+    """
+    Run-wide switches for predict_heat_index, read from HEAT_INDEX_* environment
+    variables and overridden by CLI flags. Plain attributes so the object can be
+    handed to worker processes.
+    """
+
+    def __init__(self, warm_start=False, full_rebuild_days=7, warm_start_rounds=10, model_dir=None,
+                 use_cache=True, cache_max_age_days=14, cache_max_entries=3, search_strategy='grid',
+                 search_max_fits=None, reuse_tuning=False, training_mode='per_city', stage='all',
+                 bootstrap_mode='exact', bootstrap_iterations=None, importance_method='sklearn',
+                 time_series_window='expanding', time_series_warm_start=False, validation_profile='standard',
+                 validation_deadline=None, cities=None, history_start=None):
+        self.warm_start = warm_start
+        self.full_rebuild_days = full_rebuild_days
+        self.warm_start_rounds = warm_start_rounds
+        self.model_dir = model_dir or os.path.join(script_dir, 'models')
+        self.use_cache = use_cache
+        self.cache_max_age_days = cache_max_age_days
+        self.cache_max_entries = cache_max_entries
+        self.search_strategy = search_strategy
+        self.search_max_fits = search_max_fits
+        self.reuse_tuning = reuse_tuning
+        if training_mode not in TRAINING_MODES:
+            raise ValueError(f"Unknown training mode: {training_mode}")
+        self.training_mode = training_mode
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        self.stage = stage
+        self.bootstrap_mode = bootstrap_mode
+        self.bootstrap_iterations = bootstrap_iterations
+        self.importance_method = importance_method
+        self.time_series_window = time_series_window
+        self.time_series_warm_start = time_series_warm_start
+        self.validation_profile = validation_profile
+        # Seconds each city's validation may take; None runs every validator in full
+        self.validation_deadline = validation_deadline
+        # Only these cities and rows from this date on are read from the weather store
+        self.cities = cities
+        self.history_start = history_start
+
+    @property
+    def cache_dir(self):
+        return os.path.join(self.model_dir, 'cache')
+
+    @property
+    def study_path(self):
+        return os.path.join(self.model_dir, 'search_studies.sqlite')
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Defaults from the environment; any non-None override (CLI flag) wins"""
+        values = {
+            'warm_start': _env_flag('HEAT_INDEX_WARM_START'),
+            'full_rebuild_days': int(os.environ.get('HEAT_INDEX_FULL_REBUILD_DAYS', 7)),
+            'warm_start_rounds': int(os.environ.get('HEAT_INDEX_WARM_START_ROUNDS', 10)),
+            'model_dir': os.environ.get('HEAT_INDEX_MODEL_DIR'),
+            'use_cache': not _env_flag('HEAT_INDEX_NO_CACHE'),
+            'cache_max_age_days': int(os.environ.get('HEAT_INDEX_CACHE_MAX_AGE_DAYS', 14)),
+            'cache_max_entries': int(os.environ.get('HEAT_INDEX_CACHE_MAX_ENTRIES', 3)),
+            'search_strategy': os.environ.get('HEAT_INDEX_SEARCH_STRATEGY', 'grid'),
+            'search_max_fits': int(os.environ['HEAT_INDEX_SEARCH_MAX_FITS']) if os.environ.get('HEAT_INDEX_SEARCH_MAX_FITS') else None,
+            'reuse_tuning': _env_flag('HEAT_INDEX_REUSE_TUNING'),
+            'training_mode': os.environ.get('HEAT_INDEX_TRAINING_MODE', 'per_city'),
+            'stage': os.environ.get('HEAT_INDEX_STAGE', 'all'),
+            'bootstrap_mode': os.environ.get('HEAT_INDEX_BOOTSTRAP_MODE', 'exact'),
+            'bootstrap_iterations': int(os.environ['HEAT_INDEX_BOOTSTRAP_ITERATIONS']) if os.environ.get('HEAT_INDEX_BOOTSTRAP_ITERATIONS') else None,
+            'importance_method': os.environ.get('HEAT_INDEX_IMPORTANCE_METHOD', 'sklearn'),
+            'time_series_window': os.environ.get('HEAT_INDEX_TIME_SERIES_WINDOW', 'expanding'),
+            'time_series_warm_start': _env_flag('HEAT_INDEX_TIME_SERIES_WARM_START'),
+            'validation_profile': os.environ.get('HEAT_INDEX_VALIDATION_PROFILE', 'standard'),
+            'validation_deadline': float(os.environ['HEAT_INDEX_VALIDATION_DEADLINE']) if os.environ.get('HEAT_INDEX_VALIDATION_DEADLINE') else None,
+            'cities': [city.strip() for city in os.environ['HEAT_INDEX_CITIES'].split(',')] if os.environ.get('HEAT_INDEX_CITIES') else None,
+            'history_start': os.environ.get('HEAT_INDEX_HISTORY_START')
+        }
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**values)
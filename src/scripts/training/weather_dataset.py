@@ -0,0 +1,116 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from loguru import logger
+from storage import parse_dates
+
+class WeatherDataset:
+    """
+    Read-only columnar copy of the historical weather data: one float32 block
+    of the numeric columns, categorical city codes and parsed dates, sorted by
+    city and date so every city is a contiguous [start, stop) row range.
+    city_frame wraps a city's range in a DataFrame without copying it, and
+    the arrays are flagged read-only so the cached dataset cannot be changed
+    through any frame built on it.
+    """
+
+    # Datasets already loaded, keyed by source, its modification time and the rows read
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, cities, codes, dates, values, columns, offsets):
+        self.cities = cities
+        self.codes = codes
+        self.dates = dates
+        self.values = values
+        self.columns = columns
+        self.offsets = offsets
+        for array in (self.codes, self.dates, self.values):
+            array.flags.writeable = False
+
+    @classmethod
+    def _cached(cls, key, build):
+        with cls._cache_lock:
+            dataset = cls._cache.get(key)
+            if dataset is None:
+                dataset = build()
+                cls._cache = {key: dataset}
+            return dataset
+
+    @classmethod
+    def from_store(cls, store, required_columns=None, cities=None, start=None, end=None):
+        """
+        Read only the given cities and date range from a storage.WeatherStore,
+        once per change to the store
+        """
+        key = (os.path.abspath(store.path), os.path.getmtime(store.path), tuple(cities or ()), start, end)
+        return cls._cached(key, lambda: cls.from_frame(store.read(cities, start, end), required_columns))
+
+    @classmethod
+    def from_frame(cls, data, required_columns=None):
+        """Build the dataset from a frame with the CSV's columns and text dates"""
+        try:
+            if required_columns and not set(required_columns).issubset(data.columns):
+                missing_cols = set(required_columns) - set(data.columns)
+                raise KeyError(f"The CSV file must contain the following columns: {', '.join(missing_cols)}")
+            numeric = [column for column in data.columns if column not in ('City', 'Date')]
+            data = data.astype({'City': 'category', **{column: np.float32 for column in numeric}})
+
+            # Rows in any other format (the bare-date Fahrenheit rows of older daily runs) are
+            # dropped; the ingest scripts check their rows with the same parse before storing them
+            data['Date'] = parse_dates(data['Date']).to_numpy()
+            unparsed = data['Date'].isna()
+            if unparsed.any():
+                logger.warning(f"Dropping {int(unparsed.sum())} of {len(data)} rows whose Date is not a timestamp")
+                data = data[~unparsed]
+                data['City'] = data['City'].cat.remove_unused_categories()
+            data = data.sort_values(by=['City', 'Date'], kind='stable', ignore_index=True)
+
+            codes = data['City'].cat.codes.to_numpy()
+            cities = list(data['City'].cat.categories)
+            bounds = np.searchsorted(codes, np.arange(len(cities) + 1))
+            offsets = {city: (int(bounds[i]), int(bounds[i + 1])) for i, city in enumerate(cities)}
+            dataset = cls(
+                cities=cities,
+                codes=codes,
+                dates=data['Date'].to_numpy(),
+                values=np.ascontiguousarray(data[numeric].to_numpy(dtype=np.float32)),
+                columns=numeric,
+                offsets=offsets
+            )
+            logger.info(f"Data loaded successfully with {len(data)} rows for {len(offsets)} cities "
+                        f"({dataset.nbytes / 1e6:.1f} MB)")
+            return dataset
+        except Exception as e:
+            logger.error(f"Error building weather dataset: {e}")
+            raise
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.dates.nbytes + self.values.nbytes
+
+    def city_frame(self, city):
+        """
+        DataFrame over one city's rows whose numeric columns are a view of the
+        shared float32 block. Adding columns to it is fine; writing into the
+        shared ones raises, so copy the frame before changing them.
+        """
+        start, stop = self.offsets[city]
+        frame = pd.DataFrame(self.values[start:stop], columns=self.columns, copy=False)
+        frame.insert(0, 'City', pd.Categorical.from_codes(self.codes[start:stop], categories=self.cities))
+        frame.insert(1, 'Date', self.dates[start:stop])
+        return frame
+
+    def groups(self):
+        """(city, frame) pairs in city order, like DataFrame.groupby('City')"""
+        return [(city, self.city_frame(city)) for city in self.cities]
+
+    def column_arrays(self):
+        """(name, array) of Date and each numeric column, for SharedCityDataset"""
+        yield 'Date', self.dates
+        for i, column in enumerate(self.columns):
+            yield column, self.values[:, i]
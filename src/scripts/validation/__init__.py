@@ -1,16 +1,41 @@
 # This file marks the validation directory as a Python package
 from .k_fold_validation import perform_k_fold_cross_validation
 from .nested_cv_validation import perform_nested_cv_with_param_tuning
-from .bootstrap_validation import bootstrap_evaluation
-from .permutation_validation import perform_permutation_test
-from .time_based_validation import perform_time_based_validation
+from .bootstrap_validation import bootstrap_evaluation, BOOTSTRAP_MODES
+from .permutation_validation import perform_permutation_test, IMPORTANCE_METHODS
+from .time_based_validation import perform_time_based_validation, TIME_SERIES_WINDOWS
+from .fold_matrix import FoldMatrix, EARLY_STOPPING_ROUNDS, fit_early_stopped
+from .validation_session import ValidationSession
+from .search_engines import get_search_engine, SEARCH_ENGINES
+from .drift_check import check_drift, load_previous_tuning, forward_window_mae, feature_shifts, RECENT_DAYS
 from .model_validator import validate_model
+from .validation_profile import (DEFAULT_PARAM_GRID, VALIDATION_PROFILES, ValidationProfile, ValidationDeadline,
+                                 get_validation_profile)
 
 __all__ = [
     'perform_k_fold_cross_validation',
     'perform_nested_cv_with_param_tuning',
     'bootstrap_evaluation',
+    'BOOTSTRAP_MODES',
     'perform_permutation_test',
+    'IMPORTANCE_METHODS',
     'perform_time_based_validation',
-    'validate_model'
+    'TIME_SERIES_WINDOWS',
+    'validate_model',
+    'FoldMatrix',
+    'ValidationSession',
+    'EARLY_STOPPING_ROUNDS',
+    'fit_early_stopped',
+    'get_search_engine',
+    'SEARCH_ENGINES',
+    'check_drift',
+    'load_previous_tuning',
+    'forward_window_mae',
+    'feature_shifts',
+    'RECENT_DAYS',
+    'DEFAULT_PARAM_GRID',
+    'VALIDATION_PROFILES',
+    'ValidationProfile',
+    'ValidationDeadline',
+    'get_validation_profile'
 ]
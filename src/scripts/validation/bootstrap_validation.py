@@ -1,42 +1,83 @@
 import numpy as np
+from joblib import Parallel, delayed
 from sklearn.utils import resample
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from loguru import logger
 
-def bootstrap_evaluation(X, y, model, n_iterations=50):  # Reduced from 100 to 50 iterations for speed
+from .fold_matrix import used_rounds
+from .validation_session import ValidationSession
+
+# 'exact' refits on resampled row copies; 'poisson' and 'multinomial' weight the rows instead
+BOOTSTRAP_MODES = ('exact', 'poisson', 'multinomial')
+
+# Share of the rows each replicate draws, as in the original 80% resample
+SAMPLE_FRACTION = 0.8
+
+def _replicate_rows(mode, n_rows, replicate):
+    """(training positions, training weights or None, out-of-bag positions) for one replicate"""
+    sample_size = int(SAMPLE_FRACTION * n_rows)
+    if mode == 'exact':
+        indices = resample(np.arange(n_rows), replace=True, n_samples=sample_size, random_state=replicate)
+        oob_mask = np.ones(n_rows, dtype=bool)
+        oob_mask[indices] = False
+        return indices, None, np.where(oob_mask)[0]
+
+    # Each replicate seeds its own generator, so replicates are independent of run order
+    rng = np.random.RandomState(replicate)
+    if mode == 'poisson':
+        counts = rng.poisson(SAMPLE_FRACTION, n_rows)
+    else:
+        counts = rng.multinomial(sample_size, np.full(n_rows, 1.0 / n_rows))
+    weights = counts.astype(np.float32)
+    return np.flatnonzero(counts), weights, np.flatnonzero(counts == 0)
+
+def _bootstrap_replicate(fold_matrix, params, mode, replicate, xgb_n_jobs):
+    """Train one replicate and score it on its out-of-bag rows"""
+    train_idx, weights, oob_idx = _replicate_rows(mode, len(fold_matrix), replicate)
+    booster = fold_matrix.fit(params, train_idx, n_jobs=xgb_n_jobs, cache=False, weights=weights)
+    y_pred = fold_matrix.predict(booster, oob_idx)
+    y_test = fold_matrix.labels(oob_idx)
+    return (mean_absolute_error(y_test, y_pred), mean_squared_error(y_test, y_pred),
+            r2_score(y_test, y_pred), used_rounds(booster))
+
+def bootstrap_evaluation(X, y, model, n_iterations=50, session=None, mode='exact', n_jobs=1, deadline=None):
     """
     Perform bootstrap evaluation of the model
+
+    model supplies the XGBoost parameters and session is the city's shared
+    ValidationSession, whose FoldMatrix cuts every replicate is binned against.
+    In 'poisson' and 'multinomial' mode each replicate weights the
+    rows by its draw counts (Poisson(0.8) per row, or a multinomial draw of 80%
+    of the rows) instead of copying duplicates, and is scored on the rows drawn
+    zero times. 'exact', the default, keeps the original resample of row
+    copies, so published bootstrap numbers stay comparable; the weighted
+    modes are opt-in and estimate a different replicate. Replicates
+    are independent and run on n_jobs threads. With a deadline
+    (ValidationDeadline) they run in batches of n_jobs and no new batch starts
+    once it has expired; 'n_iterations' reports how many replicates ran.
     """
     try:
-        logger.info(f"Performing bootstrap evaluation with {n_iterations} iterations")
+        if mode not in BOOTSTRAP_MODES:
+            raise ValueError(f"Unknown bootstrap mode '{mode}', expected one of: {', '.join(BOOTSTRAP_MODES)}")
+        logger.info(f"Performing {mode} bootstrap evaluation with {n_iterations} iterations on {n_jobs} workers")
         
-        # Pre-allocate arrays for performance
-        mae_scores = np.zeros(n_iterations)
-        mse_scores = np.zeros(n_iterations)
-        r2_scores = np.zeros(n_iterations)
+        if session is None:
+            session = ValidationSession(X, y, n_jobs=model.n_jobs or 1)
+        params = model.get_params()
         
-        # Calculate the sample size once
-        sample_size = int(0.8 * len(X))
-        indices_pool = np.arange(len(X))
-        
-        for i in range(n_iterations):
-            # Bootstrap sampling - more efficient implementation
-            indices = resample(indices_pool, replace=True, n_samples=sample_size, random_state=i)
-            test_mask = np.ones(len(X), dtype=bool)
-            test_mask[indices] = False
-            test_indices = np.where(test_mask)[0]
-            
-            X_train, y_train = X.iloc[indices], y.iloc[indices]
-            X_test, y_test = X.iloc[test_indices], y.iloc[test_indices]
-            
-            # Train and evaluate
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            
-            # Calculate metrics
-            mae_scores[i] = mean_absolute_error(y_test, y_pred)
-            mse_scores[i] = mean_squared_error(y_test, y_pred)
-            r2_scores[i] = r2_score(y_test, y_pred)
+        batch_size = n_iterations if deadline is None else max(1, n_jobs)
+        replicates = []
+        with Parallel(n_jobs=n_jobs, prefer='threads') as parallel:
+            for start in range(0, n_iterations, batch_size):
+                if replicates and deadline is not None and deadline.expired:
+                    logger.warning(f"Validation deadline reached, bootstrap stopped after "
+                                   f"{len(replicates)} of {n_iterations} iterations")
+                    break
+                replicates.extend(parallel(
+                    delayed(_bootstrap_replicate)(session.fold_matrix, params, mode, i, model.n_jobs or 1)
+                    for i in range(start, min(start + batch_size, n_iterations))
+                ))
+        mae_scores, mse_scores, r2_scores, best_iterations = (np.array(column) for column in zip(*replicates))
         
         # Calculate confidence intervals - vectorized operations
         bootstrap_results = {
@@ -57,7 +98,10 @@ def bootstrap_evaluation(X, y, model, n_iterations=50):  # Reduced from 100 to 5
                 'std': np.std(r2_scores),
                 'ci_lower': np.percentile(r2_scores, 2.5),
                 'ci_upper': np.percentile(r2_scores, 97.5)
-            }
+            },
+            'best_iterations': best_iterations.tolist(),
+            'mode': mode,
+            'n_iterations': len(replicates)
         }
         
         logger.info(f"Bootstrap evaluation results:")
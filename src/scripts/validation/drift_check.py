@@ -0,0 +1,132 @@
+import os
+import glob
+import json
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error
+from loguru import logger
+
+from .fold_matrix import fit_early_stopped
+
+# Days at the end of a city's data that the drift check and the forward-window MAE score
+RECENT_DAYS = 30
+
+def load_previous_tuning(output_dir, training_mode='per_city'):
+    """
+    Collect each city's last tuned parameters, nested CV MSE and forward-window
+    MAE from the newest *_model_validation_results.json written in
+    training_mode. Pooled runs tag their records 'training_mode': 'pooled'
+    and give every city the pooled tuning, so a per-city run skips them.
+    """
+    try:
+        result_files = sorted(glob.glob(os.path.join(output_dir, '*_model_validation_results.json')))
+        for result_file in reversed(result_files):
+            with open(result_file, 'r') as f:
+                records = [record for record in json.load(f)
+                           if (record.get('training_mode') or 'per_city') == training_mode]
+            if not records:
+                continue
+
+            previous = {}
+            for record in records:
+                nested_cv = record.get('nested_cv') or {}
+                if record.get('city') and nested_cv.get('best_params'):
+                    previous[record['city']] = {
+                        'best_params': nested_cv['best_params'],
+                        'mean_mse': nested_cv.get('mean_mse'),
+                        'std_mse': nested_cv.get('std_mse'),
+                        'forward_mae': nested_cv.get('forward_mae')
+                    }
+            logger.info(f"Loaded previous {training_mode} tuning for {len(previous)} cities "
+                        f"from {os.path.basename(result_file)}")
+            return previous
+
+        logger.info(f"No previous {training_mode} validation results found, every city will be tuned")
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not load previous tuning results: {e}")
+        return {}
+
+def split_recent(data, recent_days=RECENT_DAYS):
+    """(history, recent): the rows up to recent_days before the latest date, and the rows after"""
+    data = data.sort_values('Date')
+    cutoff = data['Date'].max() - pd.Timedelta(days=recent_days)
+    return data[data['Date'] <= cutoff], data[data['Date'] > cutoff]
+
+def feature_shifts(recent, reference, history, features):
+    """
+    Effect size of each feature's shift: the distance between its recent and
+    reference means, in standard deviations of its whole history. Unlike a
+    test's p-value it does not grow with the number of rows, and dividing by
+    the history's spread rather than the window's keeps a calm month from
+    turning small moves into large ones.
+    """
+    shifts = {}
+    for feature in features:
+        scale = float(np.std(history[feature].to_numpy(dtype=np.float64)))
+        difference = abs(float(recent[feature].mean()) - float(reference[feature].mean()))
+        shifts[feature] = difference / scale if scale > 0 else (np.inf if difference > 0 else 0.0)
+    return shifts
+
+def forward_window_mae(data, features, target, best_params, recent_days=RECENT_DAYS, n_jobs=1):
+    """
+    MAE on the last recent_days of a model with best_params trained on the
+    rows before them; None without enough rows on either side. Validation
+    stores it at tuning time as the reference check_drift compares against.
+    """
+    history, recent = split_recent(data, recent_days)
+    if len(recent) < 5 or len(history) < 30:
+        return None
+    model = xgb.XGBRegressor(objective='reg:squarederror', tree_method='hist', n_jobs=n_jobs, verbosity=0,
+                             **(best_params or {}))
+    model = fit_early_stopped(model, history[features], history[target])
+    return float(mean_absolute_error(recent[target], model.predict(recent[features])))
+
+def check_drift(data, features, target, best_params, reference_mae, recent_days=RECENT_DAYS, shift_threshold=1.0,
+                mae_tolerance=0.25, n_jobs=1):
+    """
+    Cheap check of whether previously tuned parameters still fit a city's data.
+
+    1. Feature shift: each weather feature's mean over the last recent_days
+       against the same calendar window in earlier years, so normal
+       seasonality is not flagged. A feature has shifted when the means are
+       more than shift_threshold standard deviations of its history apart.
+    2. Forward error: forward_window_mae with best_params must stay within
+       mae_tolerance of reference_mae, the same measure taken when the
+       parameters were tuned.
+    """
+    try:
+        history, recent = split_recent(data, recent_days)
+        if len(recent) < 5 or len(history) < 30:
+            return {'drifted': True, 'reason': 'not enough history for a drift check'}
+
+        # Reference rows: the recent window's calendar days in previous years
+        recent_days_of_year = set(recent['Date'].dt.dayofyear)
+        reference = history[history['Date'].dt.dayofyear.isin(recent_days_of_year)]
+        if len(reference) < 5:
+            reference = history
+
+        weather_features = [feature for feature in features if feature != 'day']
+        shifts = feature_shifts(recent, reference, history, weather_features)
+        shifted = [feature for feature, shift in shifts.items() if shift > shift_threshold]
+
+        recent_mae = forward_window_mae(data, features, target, best_params, recent_days, n_jobs=n_jobs)
+        mae_limit = reference_mae * (1 + mae_tolerance) if reference_mae is not None else None
+        error_drift = mae_limit is not None and recent_mae > mae_limit
+
+        result = {
+            'drifted': bool(shifted) or error_drift or mae_limit is None,
+            'shifted_features': shifted,
+            'feature_shifts': {feature: round(shift, 4) for feature, shift in shifts.items()},
+            'recent_mae': recent_mae,
+            'reference_mae': reference_mae,
+            'recent_rows': len(recent)
+        }
+        logger.info(f"Drift check: shifted features {shifted or 'none'}, recent MAE {recent_mae:.4f} "
+                    f"vs reference {reference_mae if reference_mae is not None else 'n/a'} -> "
+                    f"{'retune' if result['drifted'] else 'reuse parameters'}")
+        return result
+    except Exception as e:
+        logger.error(f"Error in drift check: {e}")
+        raise
@@ -0,0 +1,190 @@
+import os
+import hashlib
+import threading
+import numpy as np
+import xgboost as xgb
+from loguru import logger
+
+# XGBRegressor's default number of boosting rounds
+DEFAULT_ROUNDS = 100
+
+# Boosting stops once the stopping rows have not improved for this many rounds; 0 disables it
+EARLY_STOPPING_ROUNDS = int(os.environ.get('HEAT_INDEX_EARLY_STOPPING_ROUNDS', 20))
+# Share of each training set held out as stopping rows
+EARLY_STOPPING_FRACTION = 0.1
+
+def split_stopping_rows(idx, early_stopping_rounds=EARLY_STOPPING_ROUNDS, chronological=False):
+    """
+    Split training positions into (fit rows, stopping rows), holding out
+    EARLY_STOPPING_FRACTION of them: the last ones for chronological folds,
+    a fixed random sample otherwise. Stopping rows are None when early stopping
+    is off or the training set is too small to spare them.
+    """
+    idx = np.asarray(idx)
+    n_stop = int(len(idx) * EARLY_STOPPING_FRACTION)
+    if not early_stopping_rounds or n_stop < 10:
+        return idx, None
+    if chronological:
+        return idx[:-n_stop], idx[-n_stop:]
+    # Shuffled folds keep their indices sorted, so the last rows would all be the latest dates
+    stop = np.zeros(len(idx), dtype=bool)
+    stop[np.random.RandomState(42).choice(len(idx), n_stop, replace=False)] = True
+    return idx[~stop], idx[stop]
+
+def used_rounds(booster):
+    """Trees a booster predicts with: up to its best iteration when it was early-stopped"""
+    try:
+        return booster.best_iteration + 1
+    except AttributeError:
+        return booster.num_boosted_rounds()
+
+def best_trees(booster):
+    """The booster cut to the trees it predicts with, ready to be trained further"""
+    rounds = used_rounds(booster)
+    if rounds == booster.num_boosted_rounds():
+        return booster
+    booster = booster[:rounds]
+    booster.set_attr(best_iteration=None, best_score=None)
+    return booster
+
+def fit_early_stopped(model, X, y, early_stopping_rounds=EARLY_STOPPING_ROUNDS):
+    """Fit an XGBRegressor with a fixed random EARLY_STOPPING_FRACTION of X, y as its early-stopping eval set"""
+    fit_idx, stop_idx = split_stopping_rows(np.arange(len(X)), early_stopping_rounds)
+    if stop_idx is None:
+        model.fit(X, y)
+        return model
+    model.set_params(early_stopping_rounds=early_stopping_rounds)
+    model.fit(X.iloc[fit_idx], y.iloc[fit_idx], eval_set=[(X.iloc[stop_idx], y.iloc[stop_idx])], verbose=False)
+    logger.info(f"Early stopping kept {used_rounds(model.get_booster())} of {model.n_estimators or DEFAULT_ROUNDS} rounds")
+    return model
+
+def booster_params(params=None, n_jobs=1):
+    """
+    Split XGBRegressor-style parameters into (xgb.train params, boosting rounds),
+    so grids and estimators written for the sklearn wrapper can drive FoldMatrix
+    """
+    params = {key: value for key, value in (params or {}).items() if value is not None}
+    rounds = int(params.pop('n_estimators', DEFAULT_ROUNDS))
+    params.pop('n_jobs', None)
+    params.pop('enable_categorical', None)
+    params.pop('missing', None)
+    params.pop('early_stopping_rounds', None)
+    params.setdefault('objective', 'reg:squarederror')
+    params.setdefault('tree_method', 'hist')
+    params['nthread'] = n_jobs
+    params['verbosity'] = 0
+    return params, rounds
+
+class FoldMatrix:
+    """
+    One city's validation rows, quantised once into an XGBoost QuantileDMatrix.
+
+    Fold matrices are built from index arrays against that reference, so they
+    reuse its histogram cuts instead of sketching every fold again, and each
+    fold's matrix is cached and shared by every configuration and validator
+    that trains on the same rows.
+    """
+
+    def __init__(self, X, y, max_bin=256, n_jobs=1):
+        self.columns = list(X.columns)
+        self.X = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+        self.y = np.ascontiguousarray(np.asarray(y, dtype=np.float32))
+        self.reference = xgb.QuantileDMatrix(self.X, self.y, max_bin=max_bin, nthread=n_jobs)
+        self.n_jobs = n_jobs
+        self.matrices_built = 0
+        self.matrices_reused = 0
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.y)
+
+    def subset(self, rows):
+        """View of some rows, e.g. an outer fold, whose indices are positions within rows"""
+        return FoldSubset(self, np.asarray(rows))
+
+    def matrix(self, idx, cache=True, weights=None):
+        """
+        Training matrix for the given row positions, built once and cached.
+        weights (one per FoldMatrix row) makes a weighted matrix, which is never cached.
+        """
+        idx = np.asarray(idx)
+        if weights is not None:
+            return xgb.QuantileDMatrix(self.X[idx], self.y[idx], weight=weights[idx], ref=self.reference,
+                                       nthread=self.n_jobs)
+        if not cache:
+            return xgb.QuantileDMatrix(self.X[idx], self.y[idx], ref=self.reference, nthread=self.n_jobs)
+        key = hashlib.sha1(idx.astype(np.int64).tobytes()).hexdigest()
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self.matrices_reused += 1
+                return view
+            view = xgb.QuantileDMatrix(self.X[idx], self.y[idx], ref=self.reference, nthread=self.n_jobs)
+            self._views[key] = view
+            self.matrices_built += 1
+            return view
+
+    def labels(self, idx):
+        return self.y[np.asarray(idx)]
+
+    def fit(self, params, train_idx, n_jobs=1, cache=True, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            evals_result=None, chronological=False, weights=None, xgb_model=None):
+        """
+        Train a booster with XGBRegressor-style params on the given rows, with
+        n_estimators as the upper bound once some rows are held out for early
+        stopping. evals_result receives the stopping rows' metric per round.
+        weights (one per FoldMatrix row) weights the training rows; the stopping
+        rows are weighted the same way. xgb_model continues an existing booster,
+        adding up to n_estimators trees to its best ones.
+        """
+        train_params, rounds = booster_params(params, n_jobs)
+        if xgb_model is not None:
+            xgb_model = best_trees(xgb_model)
+        fit_idx, stop_idx = split_stopping_rows(train_idx, early_stopping_rounds, chronological)
+        if stop_idx is None:
+            return xgb.train(train_params, self.matrix(train_idx, cache, weights), num_boost_round=rounds,
+                             xgb_model=xgb_model)
+        return xgb.train(train_params, self.matrix(fit_idx, cache, weights), num_boost_round=rounds,
+                         evals=[(self.matrix(stop_idx, cache, weights), 'stop')],
+                         early_stopping_rounds=early_stopping_rounds,
+                         evals_result=evals_result, verbose_eval=False, xgb_model=xgb_model)
+
+    def predict(self, booster, idx, rounds=None):
+        """Predict the given rows with the booster's first `rounds` trees (default: up to its best iteration)"""
+        return booster.inplace_predict(self.X[np.asarray(idx)], iteration_range=(0, rounds or used_rounds(booster)))
+
+class FoldSubset:
+    """Row subset of a FoldMatrix that shares its reference cuts and matrix cache"""
+
+    def __init__(self, parent, rows):
+        self.parent = parent
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def subset(self, rows):
+        return FoldSubset(self.parent, self.rows[np.asarray(rows)])
+
+    def _parent_weights(self, weights):
+        if weights is None:
+            return None
+        parent_weights = np.zeros(len(self.parent), dtype=np.float32)
+        parent_weights[self.rows] = weights
+        return parent_weights
+
+    def matrix(self, idx, cache=True, weights=None):
+        return self.parent.matrix(self.rows[np.asarray(idx)], cache, self._parent_weights(weights))
+
+    def labels(self, idx):
+        return self.parent.labels(self.rows[np.asarray(idx)])
+
+    def fit(self, params, train_idx, n_jobs=1, cache=True, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            evals_result=None, chronological=False, weights=None, xgb_model=None):
+        return self.parent.fit(params, self.rows[np.asarray(train_idx)], n_jobs, cache,
+                               early_stopping_rounds, evals_result, chronological,
+                               self._parent_weights(weights), xgb_model)
+
+    def predict(self, booster, idx, rounds=None):
+        return self.parent.predict(booster, self.rows[np.asarray(idx)], rounds)
@@ -1,29 +1,30 @@
 import numpy as np
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from joblib import Parallel, delayed
 from loguru import logger
 
-def perform_k_fold_cross_validation(X, y, model, n_splits=5):
+from .validation_session import ValidationSession
+
+def perform_k_fold_cross_validation(X, y, model, n_splits=5, session=None, fold_jobs=1):
     """
     Perform k-fold cross-validation and return results
+
+    model supplies the XGBoost parameters; session is the city's shared
+    ValidationSession for X, y (built here when not given), which keeps the
+    fold models and out-of-fold predictions for the other validators. Each
+    fold trains its own booster, so fold_jobs folds run at once on threads.
     """
     try:
         logger.info(f"Performing {n_splits}-fold cross-validation")
-        kf = KFold(n_splits=n_splits, shuffle=True, random_state=42)
-        mae_scores = []
-        mse_scores = []
-        r2_scores = []
+        if session is None:
+            session = ValidationSession(X, y, n_jobs=model.n_jobs or 1)
+        params = model.get_params()
         
-        for train_index, test_index in kf.split(X):
-            X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-            y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-            
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            
-            mae_scores.append(mean_absolute_error(y_test, y_pred))
-            mse_scores.append(mean_squared_error(y_test, y_pred))
-            r2_scores.append(r2_score(y_test, y_pred))
+        # Results come back in fold order whatever the number of workers
+        fold_results = Parallel(n_jobs=fold_jobs, prefer='threads')(
+            delayed(session.fold_scores)('k_fold', fold, params, n_splits, model.n_jobs or 1)
+            for fold in range(n_splits)
+        )
+        mae_scores, mse_scores, r2_scores, best_iterations = (list(column) for column in zip(*fold_results))
         
         cv_results = {
             'mean_mae': np.mean(mae_scores),
@@ -31,7 +32,8 @@ def perform_k_fold_cross_validation(X, y, model, n_splits=5):
             'mean_mse': np.mean(mse_scores),
             'std_mse': np.std(mse_scores),
             'mean_r2': np.mean(r2_scores),
-            'std_r2': np.std(r2_scores)
+            'std_r2': np.std(r2_scores),
+            'best_iterations': best_iterations
         }
         
         logger.info(f"Cross-validation results: MAE={cv_results['mean_mae']:.4f}±{cv_results['std_mae']:.4f}, " 
@@ -2,52 +2,157 @@ import xgboost as xgb
 from loguru import logger
 from tqdm import tqdm
 
+from training import CPUBudget
+
 from .k_fold_validation import perform_k_fold_cross_validation
 from .nested_cv_validation import perform_nested_cv_with_param_tuning
 from .bootstrap_validation import bootstrap_evaluation
 from .permutation_validation import perform_permutation_test
 from .time_based_validation import perform_time_based_validation
+from .drift_check import check_drift, forward_window_mae
+from .validation_session import ValidationSession
+from .validation_profile import ValidationDeadline, get_validation_profile
 
-def validate_model(city, data, features, target='Heat Index'):
+def validate_model(city, data, features, target='Heat Index', cpu_budget=None, search_strategy='grid',
+                   max_fits=None, study_path=None, previous_tuning=None, bootstrap_mode='exact',
+                   bootstrap_iterations=None, importance_method='sklearn',
+                   time_series_window='expanding', time_series_warm_start=False, profile='standard',
+                   deadline_seconds=None):
     """
     Comprehensive model validation using multiple techniques
+
+    cpu_budget (CPUBudget): Search jobs and XGBoost threads available to this city
+    search_strategy (str): Nested CV search engine, 'grid' or 'halving'
+    max_fits (int): Optional cap on search fits per outer fold
+    study_path (str): Optional SQLite file recording search trials for resuming
+    previous_tuning (dict): The city's last best_params, nested CV MSE and forward-window MAE;
+        when given, nested CV only reruns if the drift check fails
+    bootstrap_mode (str): 'exact' (resampled copies, the default), or 'poisson' / 'multinomial' (weighted replicates)
+    bootstrap_iterations (int): Bootstrap replicates, run on the search jobs' workers (default: the profile's)
+    importance_method (str): 'sklearn' (in-sample permutation, the default), 'batched' (out-of-fold
+        permutation) or 'shap'; recorded as 'feature_importance_method' since each measures something else
+    time_series_window (str): 'expanding' or 'rolling' training windows for time-based validation
+    time_series_warm_start (bool): Continue each expanding split's booster from the previous split
+    profile (str): 'quick', 'standard' or 'full' validator sizes (folds, search grid, repeats)
+    deadline_seconds (float): Optional wall-clock budget for this city. Once it is spent, nested CV
+        and the bootstrap finish early and the remaining validators are skipped; the results list
+        every truncated validator under 'truncated'
     """
     try:
+        if cpu_budget is None:
+            cpu_budget = CPUBudget.from_env().plan(n_cities=1)
         tqdm.write(f"🔍 Checking accuracy for {city} forecast")
         
+        profile = get_validation_profile(profile)
+        deadline = ValidationDeadline(deadline_seconds)
+        bootstrap_iterations = bootstrap_iterations or profile.bootstrap_iterations
+        n_splits = profile.n_splits
+        truncated = {}
+        validator_seconds = {}
+        step_started = deadline.elapsed
+        
+        def step_done(validator):
+            nonlocal step_started
+            now = deadline.elapsed
+            validator_seconds[validator] = now - step_started
+            step_started = now
+        
+        def out_of_time(validator):
+            if deadline.expired:
+                logger.warning(f"Validation deadline of {deadline_seconds}s reached for {city}, skipping {validator}")
+                truncated[validator] = 'skipped'
+                return True
+            return False
+        
         X = data[features]
         y = data[target]
         
         # Create a progress bar for validation steps
         with tqdm(total=5, desc=f"Testing {city} data", leave=False, position=1) as pbar:
             # Basic model
-            model = xgb.XGBRegressor(objective='reg:squarederror')
+            model = xgb.XGBRegressor(objective='reg:squarederror', tree_method='hist', n_jobs=cpu_budget.xgb_threads)
+            
+            # Quantise the city's rows and plan the folds once; validators share the trained fold models
+            session = ValidationSession(X, y, dates=data['Date'], n_jobs=cpu_budget.xgb_threads)
             
-            # 1. K-fold cross-validation
-            cv_results = perform_k_fold_cross_validation(X, y, model, n_splits=5)
+            # 1. K-fold cross-validation, always run as the baseline score
+            cv_results = perform_k_fold_cross_validation(X, y, model, n_splits=n_splits, session=session,
+                                                         fold_jobs=cpu_budget.search_jobs)
+            step_done('cross_validation')
             pbar.update(1)
             
             # 2. Nested cross-validation with hyperparameter tuning
-            param_grid = {
-                'n_estimators': [50, 100, 200],
-                'max_depth': [3, 5, 7],
-                'learning_rate': [0.01, 0.1, 0.2]
-            }
-            nested_cv_mse, nested_cv_mse_std, best_params = perform_nested_cv_with_param_tuning(X, y, param_grid)
+            drift = None
+            nested_cv_mse = nested_cv_mse_std = nested_cv_iterations = None
+            # The next run's drift check compares against the MAE measured when the parameters were tuned
+            forward_mae = previous_tuning.get('forward_mae') if previous_tuning else None
+            if out_of_time('nested_cv'):
+                # Keep last run's parameters, or XGBoost defaults for a city never tuned
+                best_params = previous_tuning['best_params'] if previous_tuning else None
+            else:
+                if previous_tuning:
+                    drift = check_drift(data, features, target, previous_tuning['best_params'],
+                                        previous_tuning.get('forward_mae'), n_jobs=cpu_budget.xgb_threads)
+                if drift is not None and not drift['drifted']:
+                    # No drift: keep last run's parameters instead of searching again
+                    nested_cv_mse = previous_tuning.get('mean_mse')
+                    nested_cv_mse_std = previous_tuning.get('std_mse')
+                    best_params = previous_tuning['best_params']
+                else:
+                    nested_cv_mse, nested_cv_mse_std, best_params, nested_cv_iterations = perform_nested_cv_with_param_tuning(
+                        X, y, profile.param_grid, n_jobs=cpu_budget.search_jobs, xgb_n_jobs=cpu_budget.xgb_threads,
+                        search_strategy=search_strategy, max_fits=max_fits, study_path=study_path, study_name=city,
+                        session=session, n_splits=n_splits, inner_splits=profile.inner_splits, deadline=deadline,
+                        profile=profile.name
+                    )
+                    if len(nested_cv_iterations) < n_splits:
+                        truncated['nested_cv'] = f"{len(nested_cv_iterations)} of {n_splits} outer folds"
+                    forward_mae = forward_window_mae(data, features, target, best_params,
+                                                     n_jobs=cpu_budget.xgb_threads)
+            step_done('nested_cv')
             pbar.update(1)
             
             # 3. Bootstrap evaluation
-            bootstrap_results = bootstrap_evaluation(X, y, model)
+            bootstrap_results = None
+            if not out_of_time('bootstrap'):
+                bootstrap_results = bootstrap_evaluation(X, y, model, n_iterations=bootstrap_iterations,
+                                                         session=session, mode=bootstrap_mode,
+                                                         n_jobs=cpu_budget.search_jobs,
+                                                         deadline=deadline if deadline_seconds else None)
+                if bootstrap_results['n_iterations'] < bootstrap_iterations:
+                    truncated['bootstrap'] = f"{bootstrap_results['n_iterations']} of {bootstrap_iterations} iterations"
+            step_done('bootstrap')
             pbar.update(1)
             
             # 4. Permutation test for feature importance
-            feature_importance = perform_permutation_test(X, y, model)
+            feature_importance = None
+            if not out_of_time('feature_importance'):
+                feature_importance = perform_permutation_test(X, y, model, n_repeats=profile.permutation_repeats,
+                                                              session=session, method=importance_method,
+                                                              n_splits=n_splits)
+            step_done('feature_importance')
             pbar.update(1)
             
             # 5. Time-based validation if data has dates
-            time_cv_results = perform_time_based_validation(data, features, target)
+            time_cv_results = None
+            if not out_of_time('time_cv'):
+                time_cv_results = perform_time_based_validation(data, features, target, n_splits=n_splits,
+                                                                n_jobs=cpu_budget.xgb_threads,
+                                                                session=session,
+                                                                fold_jobs=cpu_budget.search_jobs,
+                                                                window=time_series_window,
+                                                                warm_start=time_series_warm_start)
+            step_done('time_cv')
+            session.log_summary()
             pbar.update(1)
             
+            if drift is not None:
+                nested_cv_results_extra = {'reused_params': not drift['drifted'], 'drift_check': drift}
+            else:
+                nested_cv_results_extra = {}
+            if truncated:
+                logger.warning(f"Validation of {city} truncated after {deadline.elapsed:.1f}s: {truncated}")
+
             # Compile all validation results
             validation_results = {
                 'city': city,
@@ -55,11 +160,21 @@ def validate_model(city, data, features, target='Heat Index'):
                 'nested_cv': {
                     'mean_mse': nested_cv_mse,
                     'std_mse': nested_cv_mse_std,
-                    'best_params': best_params
+                    'best_params': best_params,
+                    'best_iterations': nested_cv_iterations,
+                    'forward_mae': forward_mae,
+                    **nested_cv_results_extra
                 },
                 'bootstrap': bootstrap_results,
                 'feature_importance': feature_importance,
-                'time_cv': time_cv_results
+                'feature_importance_method': importance_method,
+                'time_cv': time_cv_results,
+                'session': session.summary(),
+                'profile': profile.name,
+                'deadline_seconds': deadline_seconds,
+                'elapsed_seconds': deadline.elapsed,
+                'truncated': truncated,
+                'validator_seconds': validator_seconds
             }
             
         tqdm.write(f"✅ Forecast validation complete for {city}")
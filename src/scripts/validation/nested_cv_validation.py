@@ -1,55 +1,74 @@
 import numpy as np
-import xgboost as xgb
-from sklearn.model_selection import KFold, GridSearchCV
-from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold
 from loguru import logger
-import multiprocessing
 
-def perform_nested_cv_with_param_tuning(X, y, param_grid):
+from .search_engines import get_search_engine
+from .validation_session import ValidationSession
+
+def perform_nested_cv_with_param_tuning(X, y, param_grid, n_jobs=1, xgb_n_jobs=1, search_strategy='grid',
+                                        max_fits=None, study_path=None, study_name=None, session=None,
+                                        n_splits=5, inner_splits=3, deadline=None, profile=None):
     """
     Perform nested cross-validation with hyperparameter tuning
+
+    n_jobs is the number of parallel search fits and xgb_n_jobs the
+    threads given to each XGBoost fit, as allotted by the CPU budget.
+    search_strategy names the inner search engine ('grid' or 'halving'),
+    max_fits caps its fits per outer fold, and study_path/study_name
+    persist finished trials so an interrupted search can resume; profile,
+    the validation profile's name, is part of the stored study's identity.
+    session is the city's shared ValidationSession for X, y (built here when
+    not given): the outer folds are its k-fold plan, the refits are its fold
+    models, and every inner fold matrix is binned against its cuts.
+    deadline (ValidationDeadline) stops the outer loop after the fold during
+    which it expires, so at least one outer fold is always scored.
+    Returns the outer MSE mean and std, the aggregated best parameters and
+    the number of trees each outer refit kept after early stopping.
     """
     try:
-        logger.info("Performing nested cross-validation with hyperparameter tuning")
+        logger.info(f"Performing nested cross-validation with {search_strategy} hyperparameter search")
         
-        # Use all available cores for GridSearchCV
-        n_jobs = min(4, multiprocessing.cpu_count())
+        if session is None:
+            session = ValidationSession(X, y, n_jobs=xgb_n_jobs)
         
-        # Outer loop
-        outer_cv = KFold(n_splits=5, shuffle=True, random_state=42)
-        inner_cv = KFold(n_splits=3, shuffle=True, random_state=42)
+        # Outer loop: the same shuffled k-fold plan k-fold cross-validation uses
+        outer_plan = session.fold_plan('k_fold', n_splits=n_splits)
+        inner_cv = KFold(n_splits=inner_splits, shuffle=True, random_state=42)
         
         outer_scores = []
         best_params_list = []
+        best_iterations = []
         
-        for train_idx, test_idx in outer_cv.split(X):
-            X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-            y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+        for fold, (train_idx, test_idx) in enumerate(outer_plan):
+            if fold > 0 and deadline is not None and deadline.expired:
+                logger.warning(f"Validation deadline reached, nested CV stopped after {fold} of {n_splits} outer folds")
+                break
+            X_train, y_train = X.iloc[train_idx], y.iloc[train_idx]
+            outer_matrix = session.fold_matrix.subset(train_idx)
             
             # Inner loop for hyperparameter tuning
-            model = GridSearchCV(
-                estimator=xgb.XGBRegressor(
-                    objective='reg:squarederror',
-                    verbosity=0  # Reduce verbosity for speed
-                ),
-                param_grid=param_grid,
-                cv=inner_cv,
-                scoring='neg_mean_squared_error',
+            engine = get_search_engine(
+                search_strategy,
                 n_jobs=n_jobs,
-                error_score='raise',
-                refit=True,
-                verbose=0
+                xgb_n_jobs=xgb_n_jobs,
+                max_fits=max_fits,
+                study_path=study_path,
+                profile=profile
+            )
+            best_params = engine.search(
+                X_train, y_train, param_grid, inner_cv,
+                study_name=f"{study_name}/outer-{fold}" if study_name else None,
+                fold_matrix=outer_matrix
             )
-            model.fit(X_train, y_train)
-            
-            # Get best model from hyperparameter tuning
-            best_params = model.best_params_
             best_params_list.append(best_params)
-            logger.info(f"Best parameters found: {best_params}")
+            logger.info(f"Best parameters found: {best_params} "
+                        f"({engine.trials_run} trials in {engine.fits_run} fits, "
+                        f"{engine.fits_reused} resumed from study store)")
             
-            # Evaluate on the test set
-            y_pred = model.predict(X_test)
-            mse = mean_squared_error(y_test, y_pred)
+            # Refit the best configuration on the outer training fold and evaluate on the test set
+            _, mse, _, kept_rounds = session.fold_scores('k_fold', fold, best_params, n_splits=n_splits,
+                                                          xgb_n_jobs=xgb_n_jobs)
+            best_iterations.append(kept_rounds)
             outer_scores.append(mse)
         
         # Aggregate best parameters across folds - take the most common value for each parameter
@@ -62,7 +81,7 @@ def perform_nested_cv_with_param_tuning(X, y, param_grid):
         
         logger.info(f"Nested CV results - Mean MSE: {np.mean(outer_scores):.4f}, Std MSE: {np.std(outer_scores):.4f}")
         logger.info(f"Final best parameters: {final_best_params}")
-        return np.mean(outer_scores), np.std(outer_scores), final_best_params
+        return np.mean(outer_scores), np.std(outer_scores), final_best_params, best_iterations
     except Exception as e:
         logger.error(f"Error in nested cross-validation: {e}")
         raise
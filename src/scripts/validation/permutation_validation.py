@@ -1,29 +1,102 @@
+import numpy as np
+import xgboost as xgb
+from sklearn.base import clone
 from sklearn.inspection import permutation_importance
 from loguru import logger
 
-def perform_permutation_test(X, y, model, n_repeats=10):
+from .fold_matrix import fit_early_stopped, used_rounds
+from .validation_session import ValidationSession
+
+# 'batched' and 'shap' reuse the session's k-fold models; 'sklearn' refits on all rows
+IMPORTANCE_METHODS = ('batched', 'shap', 'sklearn')
+
+def _batched_importances(session, params, n_repeats, xgb_n_jobs, n_splits=5):
+    """
+    R² drop per feature and repeat when the feature is shuffled in each k-fold
+    test set, averaged over folds. Every shuffled copy of a fold's test rows is
+    stacked into one matrix and scored with a single predict call.
+    """
+    rng = np.random.RandomState(42)
+    n_features = session.fold_matrix.X.shape[1]
+    importances = np.zeros((n_features, n_repeats))
+    for fold in range(n_splits):
+        booster, test_idx, predictions = session.fold_artifacts('k_fold', fold, params, n_splits, xgb_n_jobs)
+        X_test = session.fold_matrix.X[test_idx]
+        y_test = session.fold_matrix.labels(test_idx)
+        n_rows = len(test_idx)
+
+        stacked = np.tile(X_test, (n_features * n_repeats, 1))
+        for feature in range(n_features):
+            for repeat in range(n_repeats):
+                start = (feature * n_repeats + repeat) * n_rows
+                stacked[start:start + n_rows, feature] = rng.permutation(X_test[:, feature])
+        y_pred = booster.inplace_predict(stacked, iteration_range=(0, used_rounds(booster)))
+        y_pred = y_pred.reshape(n_features, n_repeats, n_rows)
+
+        total = np.sum((y_test - y_test.mean()) ** 2)
+        baseline = 1 - np.sum((y_test - predictions) ** 2) / total
+        permuted = 1 - np.sum((y_test - y_pred) ** 2, axis=-1) / total
+        importances += (baseline - permuted) / n_splits
+    return importances
+
+def _shap_importances(session, params, xgb_n_jobs, n_splits=5):
+    """
+    Mean absolute TreeSHAP contribution (pred_contribs) per feature on each
+    k-fold test set, one column per fold
+    """
+    n_features = session.fold_matrix.X.shape[1]
+    importances = np.zeros((n_features, n_splits))
+    for fold in range(n_splits):
+        booster, test_idx, _ = session.fold_artifacts('k_fold', fold, params, n_splits, xgb_n_jobs)
+        contributions = booster.predict(xgb.DMatrix(session.fold_matrix.X[test_idx]), pred_contribs=True,
+                                        iteration_range=(0, used_rounds(booster)))
+        # The last column is the bias term
+        importances[:, fold] = np.abs(contributions[:, :n_features]).mean(axis=0)
+    return importances
+
+def perform_permutation_test(X, y, model, n_repeats=10, session=None, method='sklearn', n_splits=5):
     """
     Perform permutation feature importance test
+
+    method 'sklearn' (the default) fits a copy of the model on all rows and
+    runs sklearn's permutation_importance in-sample. 'batched' measures the
+    R² drop out of fold with the k-fold models the city's ValidationSession
+    already trained, scoring all shuffled copies in one predict call per fold.
+    'shap' reports the mean absolute TreeSHAP contribution on the same folds,
+    with std across folds. The three are different quantities; only compare
+    results of the same method. Without a session a new one is built.
+    n_splits selects the session's k-fold plan.
     """
     try:
-        logger.info("Performing permutation feature importance test")
-        
-        # Train the model
-        model.fit(X, y)
+        if method not in IMPORTANCE_METHODS:
+            raise ValueError(f"Unknown importance method '{method}', expected one of: {', '.join(IMPORTANCE_METHODS)}")
+        logger.info(f"Performing {method} feature importance test")
         
-        # Calculate baseline score
-        baseline_score = model.score(X, y)
-        logger.info(f"Baseline model R² score: {baseline_score:.4f}")
-        
-        # Calculate permutation importance
-        r = permutation_importance(model, X, y, n_repeats=n_repeats, random_state=42)
+        if method == 'sklearn':
+            # Train a copy of the model, stopping early on held-out rows
+            model = fit_early_stopped(clone(model), X, y)
+            
+            # Calculate baseline score
+            baseline_score = model.score(X, y)
+            logger.info(f"Baseline model R² score: {baseline_score:.4f}")
+            
+            # Calculate permutation importance
+            importances = permutation_importance(model, X, y, n_repeats=n_repeats, random_state=42).importances
+        else:
+            if session is None:
+                session = ValidationSession(X, y, n_jobs=model.n_jobs or 1)
+            if method == 'shap':
+                importances = _shap_importances(session, model.get_params(), model.n_jobs or 1, n_splits)
+            else:
+                importances = _batched_importances(session, model.get_params(), n_repeats, model.n_jobs or 1,
+                                                   n_splits)
         
         # Summarize feature importance
         feature_importance = {}
         for i in range(len(X.columns)):
             feature = X.columns[i]
-            score_mean = r.importances_mean[i]
-            score_std = r.importances_std[i]
+            score_mean = np.mean(importances[i])
+            score_std = np.std(importances[i])
             feature_importance[feature] = {
                 'importance': score_mean,
                 'std': score_std
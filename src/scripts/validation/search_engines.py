@@ -0,0 +1,242 @@
+import os
+import json
+import math
+import sqlite3
+import hashlib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterGrid
+from sklearn.metrics import mean_squared_error
+from loguru import logger
+
+from .fold_matrix import FoldMatrix, DEFAULT_ROUNDS
+
+def _config_key(params):
+    return json.dumps(params, sort_keys=True, default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+def _fit_and_score(params, rounds, fold_matrix, train_idx, test_idx, xgb_n_jobs):
+    """
+    Train one configuration on one inner fold for the largest of `rounds` and
+    return the negated MSE of each round count. A booster's first n trees are
+    exactly what n_estimators=n would train, so configurations that differ only
+    in n_estimators share one fit. With early stopping, the stopping rows' metric
+    curve gives the iteration a run capped at n rounds would have kept.
+    """
+    history = {}
+    booster = fold_matrix.fit({**params, 'n_estimators': max(rounds)}, train_idx, n_jobs=xgb_n_jobs,
+                              evals_result=history)
+    curve = list(history['stop'].values())[-1] if history else None
+    y_test = fold_matrix.labels(test_idx)
+    scores = []
+    for n in rounds:
+        kept = int(np.argmin(curve[:n])) + 1 if curve else n
+        scores.append(-mean_squared_error(y_test, fold_matrix.predict(booster, test_idx, kept)))
+    return scores
+
+class StudyStore:
+    """
+    SQLite record of finished trials so an interrupted search resumes where it stopped.
+    Trials older than max_age_days are pruned when the store is opened.
+    """
+
+    def __init__(self, path, max_age_days=14):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS trials (
+                    study TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    rung INTEGER NOT NULL,
+                    fold INTEGER NOT NULL,
+                    score REAL NOT NULL,
+                    recorded_at REAL NOT NULL DEFAULT (julianday('now')),
+                    PRIMARY KEY (study, config, rung, fold)
+                )
+            """)
+            conn.execute("DELETE FROM trials WHERE recorded_at < julianday('now') - ?", (max_age_days,))
+
+    def _connect(self):
+        # Several city workers may share the file, so wait for locks instead of failing
+        return sqlite3.connect(self.path, timeout=60)
+
+    def load(self, study):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT config, rung, fold, score FROM trials WHERE study = ?", (study,))
+            return {(config, rung, fold): score for config, rung, fold, score in rows}
+
+    def record(self, study, trials):
+        """trials: iterable of (config, rung, fold, score)"""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO trials (study, config, rung, fold, score) VALUES (?, ?, ?, ?, ?)",
+                [(study, config, rung, fold, score) for config, rung, fold, score in trials]
+            )
+
+class SearchEngine:
+    """
+    Base class for the hyperparameter search used inside nested CV.
+    Subclasses decide which configurations run on how much data; trial
+    evaluation, parallelism and the study store are shared here.
+    """
+
+    name = None
+
+    def __init__(self, n_jobs=1, xgb_n_jobs=1, max_fits=None, study_path=None, random_state=42, profile=None):
+        self.n_jobs = n_jobs
+        self.xgb_n_jobs = xgb_n_jobs
+        self.max_fits = max_fits
+        self.store = StudyStore(study_path) if study_path else None
+        self.random_state = random_state
+        self.profile = profile
+        self.fits_run = 0
+        self.trials_run = 0
+        self.fits_reused = 0
+
+    def _study_id(self, study_name, X, y, param_grid, inner_cv):
+        """
+        Tie stored trials to the exact rows, search space, inner CV and engine
+        settings they were computed on; the grid is canonicalized so listing
+        its keys or values in another order resumes the same study
+        """
+        grid = {name: sorted(values, key=_config_key) for name, values in param_grid.items()}
+        digest = hashlib.sha256(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+        digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+        digest.update(f"{self.name}:{self.max_fits}:{self.random_state}:{self.profile}:{inner_cv!r}:"
+                      f"{_config_key(grid)}".encode('utf-8'))
+        return f"{study_name}:{digest.hexdigest()[:16]}"
+
+    def _evaluate(self, configs, fold_matrix, folds, rung, fraction, study):
+        """Mean inner-CV score per configuration, training on the first `fraction` of each fold"""
+        done = self.store.load(study) if (self.store and study) else {}
+        rng = np.random.RandomState(self.random_state)
+        fold_plans = []
+        for train_idx, test_idx in folds:
+            # Shuffle once per fold so every rung's subsample is a prefix of the next one
+            train_idx = rng.permutation(train_idx)
+            fold_plans.append((train_idx[:max(1, int(math.ceil(len(train_idx) * fraction)))], test_idx))
+
+        # Pending trials grouped by fold and every parameter except n_estimators
+        pending = {}
+        scores = {}
+        for params in configs:
+            key = _config_key(params)
+            base = {name: value for name, value in params.items() if name != 'n_estimators'}
+            for fold, (train_idx, test_idx) in enumerate(fold_plans):
+                if (key, rung, fold) in done:
+                    scores[(key, fold)] = done[(key, rung, fold)]
+                    self.fits_reused += 1
+                else:
+                    group = pending.setdefault((_config_key(base), fold), (base, fold, []))
+                    group[2].append((key, params.get('n_estimators', DEFAULT_ROUNDS)))
+
+        if pending:
+            groups = list(pending.values())
+            # Threads, so every fit shares the fold matrices; XGBoost releases the GIL while training
+            results = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                delayed(_fit_and_score)(base, [rounds for _, rounds in trials], fold_matrix,
+                                        *fold_plans[fold], self.xgb_n_jobs)
+                for base, fold, trials in groups
+            )
+            recorded = []
+            for (base, fold, trials), group_scores in zip(groups, results):
+                self.fits_run += 1
+                self.trials_run += len(trials)
+                for (key, _), score in zip(trials, group_scores):
+                    scores[(key, fold)] = score
+                    recorded.append((key, rung, fold, score))
+            if self.store and study:
+                self.store.record(study, recorded)
+
+        return [np.mean([scores[(_config_key(params), fold)] for fold in range(len(fold_plans))])
+                for params in configs]
+
+    def _fold_matrix(self, X, y, fold_matrix):
+        return fold_matrix if fold_matrix is not None else FoldMatrix(X, y, n_jobs=self.xgb_n_jobs)
+
+    def search(self, X, y, param_grid, inner_cv, study_name=None, fold_matrix=None):
+        """
+        Return the best parameter dict for X, y. fold_matrix is an optional
+        FoldMatrix (or subset) over the same rows, shared with other searches
+        """
+        raise NotImplementedError
+
+class GridSearchEngine(SearchEngine):
+    """Exhaustive search: every configuration on every inner fold with all rows"""
+
+    name = 'grid'
+
+    def search(self, X, y, param_grid, inner_cv, study_name=None, fold_matrix=None):
+        fold_matrix = self._fold_matrix(X, y, fold_matrix)
+        configs = list(ParameterGrid(param_grid))
+        folds = list(inner_cv.split(X))
+        if self.max_fits and len(configs) * len(folds) > self.max_fits:
+            keep = max(1, self.max_fits // len(folds))
+            rng = np.random.RandomState(self.random_state)
+            configs = [configs[i] for i in sorted(rng.choice(len(configs), keep, replace=False))]
+            logger.info(f"Fit budget {self.max_fits} allows {keep} sampled grid configurations")
+
+        study = self._study_id(study_name, X, y, param_grid, inner_cv) if study_name else None
+        scores = self._evaluate(configs, fold_matrix, folds, rung=0, fraction=1.0, study=study)
+        return configs[int(np.argmax(scores))]
+
+class SuccessiveHalvingEngine(SearchEngine):
+    """
+    Successive halving: all configurations start on a small share of the
+    training rows, and only the best 1/eta move on to the next rung with
+    eta times more data, until the survivors are scored on all rows
+    """
+
+    name = 'halving'
+
+    def __init__(self, eta=3, **kwargs):
+        super().__init__(**kwargs)
+        self.eta = eta
+
+    def _rung_sizes(self, n_configs):
+        """Configurations scored per rung; a lone final survivor needs no scoring"""
+        sizes = [n_configs]
+        while sizes[-1] > self.eta:
+            sizes.append(int(math.ceil(sizes[-1] / self.eta)))
+        return sizes
+
+    def search(self, X, y, param_grid, inner_cv, study_name=None, fold_matrix=None):
+        fold_matrix = self._fold_matrix(X, y, fold_matrix)
+        configs = list(ParameterGrid(param_grid))
+        folds = list(inner_cv.split(X))
+
+        # Shrink the starting pool until the whole schedule fits the fit budget
+        n_configs = len(configs)
+        while self.max_fits and n_configs > 1 and sum(self._rung_sizes(n_configs)) * len(folds) > self.max_fits:
+            n_configs -= 1
+        if n_configs < len(configs):
+            rng = np.random.RandomState(self.random_state)
+            configs = [configs[i] for i in sorted(rng.choice(len(configs), n_configs, replace=False))]
+            logger.info(f"Fit budget {self.max_fits} allows {n_configs} starting configurations")
+
+        rung_sizes = self._rung_sizes(len(configs))
+        n_rungs = len(rung_sizes)
+        study = self._study_id(study_name, X, y, param_grid, inner_cv) if study_name else None
+        survivors = configs
+        for rung, size in enumerate(rung_sizes):
+            fraction = 1.0 / (self.eta ** (n_rungs - 1 - rung))
+            if len(survivors) > size:
+                survivors = survivors[:size]
+            scores = self._evaluate(survivors, fold_matrix, folds, rung=rung, fraction=fraction, study=study)
+            order = np.argsort(scores, kind='stable')[::-1]
+            survivors = [survivors[i] for i in order]
+            logger.info(f"Halving rung {rung}: {len(order)} configurations on {fraction:.0%} of rows, "
+                        f"best score {scores[order[0]]:.4f}")
+        return survivors[0]
+
+SEARCH_ENGINES = {
+    GridSearchEngine.name: GridSearchEngine,
+    SuccessiveHalvingEngine.name: SuccessiveHalvingEngine
+}
+
+def get_search_engine(name, **kwargs):
+    """Instantiate a search engine by strategy name"""
+    if name not in SEARCH_ENGINES:
+        raise ValueError(f"Unknown search strategy '{name}', expected one of: {', '.join(SEARCH_ENGINES)}")
+    return SEARCH_ENGINES[name](**kwargs)
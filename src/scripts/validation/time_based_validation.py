@@ -1,45 +1,53 @@
 import numpy as np
-import xgboost as xgb
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from joblib import Parallel, delayed
 from loguru import logger
 
-def perform_time_based_validation(data, features, target, n_splits=5):
+from .validation_session import ValidationSession
+
+# 'expanding' trains each split on all earlier rows, 'rolling' on a fixed window of the latest ones
+TIME_SERIES_WINDOWS = ('expanding', 'rolling')
+
+def perform_time_based_validation(data, features, target, n_splits=5, n_jobs=None, session=None, fold_jobs=1,
+                                  window='expanding', warm_start=False):
     """
     Perform time-based cross-validation
+
+    n_jobs is the threads per XGBoost fit. session, when given, is the city's
+    shared ValidationSession over data's rows and dates, which plans the
+    date-ordered splits. Retrained splits are independent fits, so fold_jobs
+    of them run at once. warm_start instead continues each split's booster
+    from the previous split, which runs the splits in order; it only applies
+    to expanding windows. Warm-started scores do not agree with the exact
+    retrain (see benchmarks.time_series_benchmark), so they are exploratory
+    and flagged as such in the results.
     """
     try:
-        logger.info(f"Performing time-based validation with {n_splits} splits")
-        
-        # Sort data by date to ensure time-based splits
-        data = data.sort_values('Date')
-        
-        # Create TimeSeriesSplit
-        tscv = TimeSeriesSplit(n_splits=n_splits)
-        
-        X = data[features]
-        y = data[target]
+        if window not in TIME_SERIES_WINDOWS:
+            raise ValueError(f"Unknown time-series window: {window}")
+        if warm_start and window == 'rolling':
+            # A continued booster keeps the trees fitted on rows the window has dropped
+            logger.warning("Warm start does not apply to rolling windows, retraining each split")
+            warm_start = False
+        logger.info(f"Performing time-based validation with {n_splits} {window} splits"
+                    f"{' (warm-started)' if warm_start else ''}")
+        if warm_start:
+            logger.warning("Warm-started time-based validation is exploratory: its scores are not "
+                           "comparable with the exact retrain's")
         
-        mae_scores = []
-        mse_scores = []
-        r2_scores = []
+        if session is None:
+            session = ValidationSession(data[features], data[target], dates=data['Date'], n_jobs=n_jobs or 1)
+        kind = 'time_series' if window == 'expanding' else 'rolling'
         
-        # Perform time series cross-validation
-        for train_index, test_index in tscv.split(X):
-            X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-            y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-            
-            # Train model
-            model = xgb.XGBRegressor(objective='reg:squarederror')
-            model.fit(X_train, y_train)
-            
-            # Make predictions
-            y_pred = model.predict(X_test)
-            
-            # Calculate metrics
-            mae_scores.append(mean_absolute_error(y_test, y_pred))
-            mse_scores.append(mean_squared_error(y_test, y_pred))
-            r2_scores.append(r2_score(y_test, y_pred))
+        # Perform time series cross-validation with XGBRegressor defaults, stopping early
+        # on each split's latest rows; results come back in split order
+        if warm_start:
+            fold_results = session.warm_fold_scores(kind, {}, n_splits, n_jobs or 1)
+        else:
+            fold_results = Parallel(n_jobs=fold_jobs, prefer='threads')(
+                delayed(session.fold_scores)(kind, fold, {}, n_splits, n_jobs or 1)
+                for fold in range(n_splits)
+            )
+        mae_scores, mse_scores, r2_scores, best_iterations = (list(column) for column in zip(*fold_results))
         
         # Summarize results
         time_cv_results = {
@@ -48,7 +56,11 @@ def perform_time_based_validation(data, features, target, n_splits=5):
             'mean_mse': np.mean(mse_scores),
             'std_mse': np.std(mse_scores),
             'mean_r2': np.mean(r2_scores),
-            'std_r2': np.std(r2_scores)
+            'std_r2': np.std(r2_scores),
+            'best_iterations': best_iterations,
+            'window': window,
+            'warm_start': warm_start,
+            'exploratory': warm_start
         }
         
         logger.info(f"Time-based validation results:")
@@ -0,0 +1,71 @@
+import time
+
+class ValidationProfile:
+    """
+    Sizes of the validators validate_model runs for one city: the folds shared
+    by k-fold CV, the nested CV outer loop, the permutation test and the
+    time-based splits, the nested CV search space, and the bootstrap and
+    permutation repeats
+    """
+
+    def __init__(self, name, n_splits, param_grid, bootstrap_iterations, permutation_repeats, inner_splits=3):
+        self.name = name
+        self.n_splits = n_splits
+        self.param_grid = param_grid
+        self.bootstrap_iterations = bootstrap_iterations
+        self.permutation_repeats = permutation_repeats
+        self.inner_splits = inner_splits
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'n_splits': self.n_splits,
+            'inner_splits': self.inner_splits,
+            'param_grid': self.param_grid,
+            'bootstrap_iterations': self.bootstrap_iterations,
+            'permutation_repeats': self.permutation_repeats
+        }
+
+# Hyperparameter search space for nested CV
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.01, 0.1, 0.2]
+}
+
+# 'standard' is the suite's original size; n_estimators values share one fit per configuration
+VALIDATION_PROFILES = {
+    'quick': ValidationProfile('quick', n_splits=3, inner_splits=2, bootstrap_iterations=10, permutation_repeats=3,
+                               param_grid={'n_estimators': [50, 100, 200], 'max_depth': [3, 5],
+                                           'learning_rate': [0.1]}),
+    'standard': ValidationProfile('standard', n_splits=5, param_grid=DEFAULT_PARAM_GRID,
+                                  bootstrap_iterations=50, permutation_repeats=10),
+    'full': ValidationProfile('full', n_splits=10, bootstrap_iterations=200, permutation_repeats=20,
+                              param_grid={**DEFAULT_PARAM_GRID, 'subsample': [0.8, 1.0]})
+}
+
+def get_validation_profile(name):
+    """Look up a validation profile by name"""
+    if name not in VALIDATION_PROFILES:
+        raise ValueError(f"Unknown validation profile '{name}', expected one of: {', '.join(VALIDATION_PROFILES)}")
+    return VALIDATION_PROFILES[name]
+
+class ValidationDeadline:
+    """Wall-clock budget for one city's validation, started when created; seconds=None never expires"""
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed)
+
+    @property
+    def expired(self):
+        return self.seconds is not None and self.elapsed >= self.seconds
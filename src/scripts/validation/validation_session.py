@@ -0,0 +1,163 @@
+import os
+import json
+import threading
+import numpy as np
+from sklearn.model_selection import KFold, TimeSeriesSplit
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from loguru import logger
+
+from .fold_matrix import FoldMatrix, booster_params, used_rounds
+
+# Training rows kept by each split of the rolling-origin time-series plan
+ROLLING_WINDOW_ROWS = int(os.environ.get('HEAT_INDEX_ROLLING_WINDOW_ROWS', 365))
+# Trees a warm-started time-series fold may add to the previous fold's booster
+WARM_START_ROUNDS = int(os.environ.get('HEAT_INDEX_TIME_SERIES_WARM_ROUNDS', 50))
+
+def _params_key(params):
+    """Canonical key for XGBRegressor-style params, ignoring thread counts"""
+    train_params, rounds = booster_params(params)
+    train_params.pop('nthread', None)
+    return json.dumps({**train_params, 'n_estimators': rounds}, sort_keys=True,
+                      default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+
+class ValidationSession:
+    """
+    One city's validation state, shared by every validator in validate_model:
+    the FoldMatrix, fold plans computed once, and each trained fold model with
+    its out-of-fold predictions. Validators request these artifacts instead of
+    splitting and training on their own, and the session counts the fits it
+    ran and the model requests it answered from its cache.
+    """
+
+    def __init__(self, X, y, dates=None, n_jobs=1):
+        self.X = X
+        self.y = y
+        self.dates = dates
+        self.n_jobs = n_jobs
+        self.fold_matrix = FoldMatrix(X, y, n_jobs=n_jobs)
+        self.fits_run = 0
+        self.fits_reused = 0
+        self._plans = {}
+        self._models = {}
+        self._predictions = {}
+        self._date_order = None
+        self._lock = threading.Lock()
+
+    def fold_plan(self, kind, n_splits=5):
+        """
+        (train positions, test positions) per fold, computed once per kind:
+        'k_fold' is the shuffled KFold shared by k-fold CV and the nested CV
+        outer loop, 'time_series' an expanding TimeSeriesSplit over the rows in
+        date order and 'rolling' the same splits trained on only the latest
+        ROLLING_WINDOW_ROWS rows. The date order is sorted once for both.
+        """
+        key = (kind, n_splits)
+        with self._lock:
+            if key not in self._plans:
+                if kind == 'k_fold':
+                    plan = list(KFold(n_splits=n_splits, shuffle=True, random_state=42).split(self.X))
+                elif kind in ('time_series', 'rolling'):
+                    if self._date_order is None:
+                        self._date_order = np.argsort(np.asarray(self.dates), kind='stable')
+                    order = self._date_order
+                    splitter = TimeSeriesSplit(n_splits=n_splits,
+                                               max_train_size=ROLLING_WINDOW_ROWS if kind == 'rolling' else None)
+                    plan = [(order[train], order[test]) for train, test in splitter.split(order)]
+                else:
+                    raise ValueError(f"Unknown fold plan: {kind}")
+                self._plans[key] = plan
+            return self._plans[key]
+
+    def _train(self, kind, fold, params, n_splits, xgb_n_jobs):
+        """(booster, whether it was trained by this call)"""
+        key = (kind, n_splits, fold, _params_key(params))
+        with self._lock:
+            booster = self._models.get(key)
+        if booster is not None:
+            return booster, False
+        train_idx, _ = self.fold_plan(kind, n_splits)[fold]
+        # Time-series folds stop early on their latest rows, like the forecast they imitate
+        booster = self.fold_matrix.fit(params, train_idx, n_jobs=xgb_n_jobs,
+                                       chronological=(kind in ('time_series', 'rolling')))
+        with self._lock:
+            self._models[key] = booster
+            self.fits_run += 1
+        return booster, True
+
+    def fold_artifacts(self, kind, fold, params, n_splits=5, xgb_n_jobs=1):
+        """
+        (booster, test positions, out-of-fold predictions) for one fold of a plan.
+        The booster is trained once per distinct set of params; later requests
+        are served from the cache and counted in fits_reused.
+        """
+        key = (kind, n_splits, fold, _params_key(params))
+        booster, trained = self._train(kind, fold, params, n_splits, xgb_n_jobs)
+        _, test_idx = self.fold_plan(kind, n_splits)[fold]
+        with self._lock:
+            predictions = self._predictions.get(key)
+            if not trained:
+                self.fits_reused += 1
+        if predictions is None:
+            predictions = self.fold_matrix.predict(booster, test_idx)
+            with self._lock:
+                self._predictions[key] = predictions
+        return booster, test_idx, predictions
+
+    def fold_scores(self, kind, fold, params, n_splits=5, xgb_n_jobs=1):
+        """(MAE, MSE, R², trees kept) of one fold model on its test rows"""
+        booster, test_idx, predictions = self.fold_artifacts(kind, fold, params, n_splits, xgb_n_jobs)
+        y_test = self.fold_matrix.labels(test_idx)
+        return (mean_absolute_error(y_test, predictions), mean_squared_error(y_test, predictions),
+                r2_score(y_test, predictions), used_rounds(booster))
+
+    def warm_fold_scores(self, kind, params, n_splits=5, xgb_n_jobs=1, rounds=WARM_START_ROUNDS):
+        """
+        fold_scores for every split of a time-series plan, training only the
+        first split from scratch. Each later split continues the previous
+        split's booster on the rows it adds, as the forecast's warm start does,
+        with up to `rounds` more trees. Splits depend on each other, so they
+        run in order. The scores are an approximation that can differ widely
+        from the exact retrain's (benchmarks.time_series_benchmark checks it),
+        so this path is exploratory only.
+        """
+        plan = self.fold_plan(kind, n_splits)
+        warm_params = {**params, 'n_estimators': rounds}
+        results = []
+        for fold, (train_idx, test_idx) in enumerate(plan):
+            if fold == 0:
+                booster, _, predictions = self.fold_artifacts(kind, 0, params, n_splits, xgb_n_jobs)
+            else:
+                key = (f'{kind}_warm', n_splits, fold, _params_key(params), rounds)
+                with self._lock:
+                    cached = self._models.get(key)
+                if cached is None:
+                    new_rows = train_idx[~np.isin(train_idx, plan[fold - 1][0])]
+                    cached = self.fold_matrix.fit(warm_params, new_rows, n_jobs=xgb_n_jobs, chronological=True,
+                                                  xgb_model=booster)
+                    with self._lock:
+                        self._models[key] = cached
+                        self.fits_run += 1
+                else:
+                    with self._lock:
+                        self.fits_reused += 1
+                booster = cached
+                predictions = self.fold_matrix.predict(booster, test_idx)
+            y_test = self.fold_matrix.labels(test_idx)
+            results.append((mean_absolute_error(y_test, predictions), mean_squared_error(y_test, predictions),
+                            r2_score(y_test, predictions), used_rounds(booster)))
+        return results
+
+    def summary(self):
+        return {
+            'fits_run': self.fits_run,
+            'fits_reused': self.fits_reused,
+            'fold_matrices_built': self.fold_matrix.matrices_built,
+            'fold_matrices_reused': self.fold_matrix.matrices_reused
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        logger.info(f"Validation session: {summary['fits_run']} fold fits run, "
+                    f"{summary['fits_reused']} saved by reusing cached fold models; "
+                    f"fold matrices {summary['fold_matrices_built']} built, "
+                    f"{summary['fold_matrices_reused']} reused")